@@ -0,0 +1,259 @@
+"""Times the operations of every structure of main.py from 10^3 to 10^6 elements, records time and
+peak memory to a JSON baseline and reports the regressions against the previous baseline."""
+import argparse
+import gc
+import json
+import os
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+
+from main import (Array, IndexedArray, Queue, BinarySearchTree, LinkedList, PooledLinkedList, MerkleTree, Stack,
+                  Graph, TreeNode, Tree)
+
+SIZES = (10 ** 3, 10 ** 4, 10 ** 5, 10 ** 6)
+# Lookups, deletions and removals timed on a structure of the benchmarked size
+QUERIES = 100
+# Timings and peak allocations below these are too noisy to be compared
+MIN_COMPARED_SECONDS = 0.01
+MIN_COMPARED_BYTES = 64 * 1024
+# A benchmark is repeated, keeping its median time, until REPEATS runs or REPEAT_SECONDS of timed runs,
+# and at least MIN_REPEATS runs
+REPEATS = 15
+MIN_REPEATS = 3
+REPEAT_SECONDS = 2.0
+# Benchmarks that regressed run again up to this many times, keeping their best results, so that
+# a moment of load on the machine is not reported as a regression
+CONFIRM_RUNS = 2
+
+
+def random_values(size, rng):
+    return [rng.randrange(10 * size) for _ in range(size)]
+
+
+def filled(structure, method, values):
+    add = getattr(structure, method)
+    for value in values:
+        add(value)
+    return structure
+
+
+def tree_of(values):
+    tree = Tree(TreeNode(values[0]))
+    for value in values[1:]:
+        tree.root.add_child(TreeNode(value))
+    return tree
+
+
+def queries(values, rng):
+    return [rng.choice(values) for _ in range(QUERIES)]
+
+
+# Benchmarks as name: (setup(values, rng) -> state, operation(state)), the setup is neither timed nor measured
+BENCHMARKS = {
+    'Array.insert': (lambda values, rng: (Array(), values),
+                     lambda state: filled(state[0], 'insert', state[1])),
+    'Array.search': (lambda values, rng: (filled(Array(), 'insert', values), queries(values, rng)),
+                     lambda state: [state[0].search(value) for value in state[1]]),
+    'Array.delete': (lambda values, rng: (filled(Array(), 'insert', values), queries(values, rng)),
+                     lambda state: [state[0].delete(value) for value in state[1]]),
+    'IndexedArray.insert_many': (lambda values, rng: (IndexedArray(), values),
+                                 lambda state: state[0].insert_many(state[1])),
+    'IndexedArray.search': (lambda values, rng: (filled(IndexedArray(), 'insert', values), queries(values, rng)),
+                            lambda state: [state[0].search(value) for value in state[1]]),
+    'IndexedArray.delete': (lambda values, rng: (filled(IndexedArray(), 'insert', values), queries(values, rng)),
+                            lambda state: [state[0].delete(value) for value in state[1]]),
+    'Queue.enqueue': (lambda values, rng: (Queue(), values),
+                      lambda state: filled(state[0], 'enqueue', state[1])),
+    'Queue.dequeue': (lambda values, rng: filled(Queue(), 'enqueue', values),
+                      lambda queue: [queue.dequeue() for _ in range(QUERIES)]),
+    'Queue.enqueue_many': (lambda values, rng: (Queue(), values),
+                           lambda state: state[0].enqueue_many(state[1])),
+    'Queue.dequeue_many': (lambda values, rng: filled(Queue(), 'enqueue', values),
+                           lambda queue: queue.dequeue_many(len(queue))),
+    'BinarySearchTree.insert': (lambda values, rng: (BinarySearchTree(), values),
+                                lambda state: filled(state[0], 'insert', state[1])),
+    'BinarySearchTree.search': (lambda values, rng: (filled(BinarySearchTree(), 'insert', values),
+                                                     queries(values, rng)),
+                                lambda state: [state[0].search(value) for value in state[1]]),
+    'BinarySearchTree.delete': (lambda values, rng: (filled(BinarySearchTree(balanced=True), 'insert', values),
+                                                     queries(values, rng)),
+                                lambda state: [state[0].delete(value) for value in state[1]]),
+    'BinarySearchTree.select': (lambda values, rng: (BinarySearchTree.from_sorted(sorted(values)),
+                                                     [rng.randrange(len(values)) for _ in range(QUERIES)]),
+                                lambda state: [state[0].select(k) for k in state[1]]),
+    'BinarySearchTree.rank': (lambda values, rng: (BinarySearchTree.from_sorted(sorted(values)), queries(values, rng)),
+                              lambda state: [state[0].rank(value) for value in state[1]]),
+    'BinarySearchTree.count': (lambda values, rng: (BinarySearchTree.from_sorted(sorted(values)), queries(values, rng)),
+                               lambda state: [state[0].count(value, 2 * value) for value in state[1]]),
+    'BinarySearchTree.insert_sorted': (lambda values, rng: (BinarySearchTree(balanced=True), sorted(values)),
+                                       lambda state: filled(state[0], 'insert', state[1])),
+    'BinarySearchTree.from_sorted': (lambda values, rng: sorted(values),
+                                     lambda keys: BinarySearchTree.from_sorted(keys)),
+    'LinkedList.insert': (lambda values, rng: (LinkedList(), values),
+                          lambda state: filled(state[0], 'insert', state[1])),
+    'LinkedList.search': (lambda values, rng: (filled(LinkedList(), 'insert', values), queries(values, rng)),
+                          lambda state: [state[0].search(value) for value in state[1]]),
+    'LinkedList.delete': (lambda values, rng: (filled(LinkedList(), 'insert', values), queries(values, rng)),
+                          lambda state: [state[0].delete(value) for value in state[1]]),
+    'MerkleTree.build_tree': (lambda values, rng: [str(value) for value in values],
+                              lambda data: MerkleTree(data)),
+    'Stack.push': (lambda values, rng: (Stack(), values),
+                   lambda state: filled(state[0], 'push', state[1])),
+    'Stack.pop': (lambda values, rng: filled(Stack(), 'push', values),
+                  lambda stack: [stack.pop() for _ in range(QUERIES)]),
+    'Graph.add_edge': (lambda values, rng: (Graph(), values, rng.sample(values, len(values))),
+                       lambda state: [state[0].add_edge(u, v) for u, v in zip(state[1], state[2])]),
+    'Tree.search': (lambda values, rng: (tree_of(values), queries(values, rng)),
+                    lambda state: [state[0].search(state[0].root, value) for value in state[1]]),
+}
+
+
+# Structures of the memory report as name: build(values) -> structure holding one node or slot per value
+MEMORY_BENCHMARKS = {
+    'Array': lambda values: filled(Array(), 'insert', values),
+    'IndexedArray': lambda values: filled(IndexedArray(), 'insert', values),
+    'Queue': lambda values: filled(Queue(), 'enqueue', values),
+    'Stack': lambda values: filled(Stack(), 'push', values),
+    'BinarySearchTree': lambda values: BinarySearchTree.from_sorted(sorted(values)),
+    'LinkedList': lambda values: filled(LinkedList(), 'insert', values),
+    'PooledLinkedList': lambda values: filled(PooledLinkedList(), 'insert', values),
+    'Tree': tree_of,
+}
+
+
+def bytes_per_node(name, size, seed=0):
+    """Returns the bytes still allocated per value once a structure of size values is built,
+    not counting the values themselves."""
+    values = random_values(size, random.Random(seed))
+    gc.collect()
+    tracemalloc.start()
+    structure = MEMORY_BENCHMARKS[name](values)
+    current_bytes, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del structure
+    return current_bytes / size
+
+
+def report_memory(sizes):
+    for name in MEMORY_BENCHMARKS:
+        for size in sizes:
+            print(f"{name:<32} {size:>9} {bytes_per_node(name, size):>12.1f} bytes/node")
+
+
+def run_benchmark(name, size, seed=0):
+    """Returns the median seconds and the peak bytes allocated by one benchmark at one size."""
+    setup, operation = BENCHMARKS[name]
+    values = random_values(size, random.Random(seed))
+
+    timings = []
+    while len(timings) < MIN_REPEATS or (len(timings) < REPEATS and sum(timings) < REPEAT_SECONDS):
+        state = setup(values, random.Random(seed))
+        gc.collect()
+        start = time.perf_counter()
+        operation(state)
+        timings.append(time.perf_counter() - start)
+
+    # Measured on a second run, tracemalloc slows down allocations
+    state = setup(values, random.Random(seed))
+    gc.collect()
+    tracemalloc.start()
+    operation(state)
+    _, peak_bytes = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {'seconds': round(statistics.median(timings), 6), 'peak_bytes': peak_bytes}
+
+
+def run_all(names, sizes):
+    """Runs the benchmarks at every size, returns {name: {size: result}}."""
+    results = {}
+    for name in names:
+        results[name] = {}
+        for size in sizes:
+            result = run_benchmark(name, size)
+            results[name][str(size)] = result
+            print(f"{name:<32} {size:>9} {result['seconds']:>12.6f}s {result['peak_bytes'] / 1024:>12.1f} KiB")
+    return results
+
+
+def regressions(baseline, results, threshold):
+    """Lists the (name, size, metric, previous, current) whose current value exceeds the previous one
+    by more than threshold, a fraction."""
+    found = []
+    for name, sizes in results.items():
+        for size, result in sizes.items():
+            previous = baseline.get(name, {}).get(size)
+            if previous is None:
+                continue
+            for metric, floor in (('seconds', MIN_COMPARED_SECONDS), ('peak_bytes', MIN_COMPARED_BYTES)):
+                if previous[metric] < floor:
+                    continue
+                if result[metric] > previous[metric] * (1 + threshold):
+                    found.append((name, size, metric, previous[metric], result[metric]))
+    return found
+
+
+def confirmed_regressions(baseline, results, threshold):
+    """Lists the regressions that remain after running the regressed benchmarks again, updating their results."""
+    found = regressions(baseline, results, threshold)
+    for _ in range(CONFIRM_RUNS):
+        if not found:
+            break
+        for name, size in sorted({(name, size) for name, size, *_ in found}):
+            rerun = run_benchmark(name, int(size))
+            results[name][size] = {metric: min(results[name][size][metric], rerun[metric]) for metric in rerun}
+        found = regressions(baseline, results, threshold)
+    return found
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmarks the data structures of main.py against a stored baseline.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(SIZES), help="numbers of elements to benchmark")
+    parser.add_argument('--only', nargs='+', choices=sorted(BENCHMARKS), default=sorted(BENCHMARKS),
+                        help="benchmarks to run, such as Queue.dequeue (default: all)")
+    parser.add_argument('--baseline', default=os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                           'benchmark_baseline.json'),
+                        help="JSON baseline compared against, written on the first run")
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help="fraction above the baseline reported as a regression (default: 0.2)")
+    parser.add_argument('--save', action='store_true', help="replace the baseline with the results of this run")
+    parser.add_argument('--memory', action='store_true',
+                        help="report the bytes per node of each structure instead of running the benchmarks")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    if args.memory:
+        report_memory(args.sizes)
+        return 0
+    results = run_all(args.only, args.sizes)
+
+    try:
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)
+    except FileNotFoundError:
+        baseline = None
+
+    found = []
+    if baseline is not None:
+        found = confirmed_regressions(baseline, results, args.threshold)
+        for name, size, metric, previous, current in found:
+            print(f"REGRESSION {name} at {size}: {metric} {previous} -> {current} (+{current / previous - 1:.0%})")
+        print(f"{len(found)} regressions above {args.threshold:.0%}")
+
+    if baseline is None or args.save:
+        # Benchmarks that did not run keep their previous results
+        merged = dict(baseline or {})
+        for name, sizes in results.items():
+            merged.setdefault(name, {}).update(sizes)
+        with open(args.baseline, 'w') as baseline_file:
+            json.dump(merged, baseline_file, indent=2, sort_keys=True)
+        print(f"Baseline written to {args.baseline}")
+    return 1 if found else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
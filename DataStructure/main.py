@@ -12,74 +12,410 @@ class Array:
         except ValueError:
             pass  # Value not found, do nothing
 
+    def insert_many(self, values):
+        self.array.extend(values)
+
     def search(self, value):
         return value in self.array
 
 
-# 2. Queue
-class Queue:
+# Marks the slots of deleted values in IndexedArray
+_DELETED = object()
+
+
+class IndexedArray(Array):
+    """Array with a value to positions index, search and delete are O(1) on average.
+    Insertion order and duplicates are kept, values must be hashable. A delete removes the first
+    occurrence, as Array does, in time proportional to its number of duplicates, and leaves an empty slot
+    that is dropped once half of the slots are empty."""
+
     def __init__(self):
-        self.queue = []
+        self._slots = []
+        self._positions = {}  # Value to the list of its slots, in insertion order
+        self._deleted = 0
+
+    @property
+    def array(self):
+        return [value for value in self._slots if value is not _DELETED]
+
+    def __len__(self):
+        return len(self._slots) - self._deleted
+
+    def __iter__(self):
+        return (value for value in self._slots if value is not _DELETED)
+
+    def insert(self, value):
+        self._positions.setdefault(value, []).append(len(self._slots))
+        self._slots.append(value)
+
+    def insert_many(self, values):
+        values = list(values)
+        # Indexed apart first, so that an unhashable value leaves the array unchanged
+        added = {}
+        for slot, value in enumerate(values, len(self._slots)):
+            added.setdefault(value, []).append(slot)
+        positions = self._positions
+        for value, slots in added.items():
+            positions.setdefault(value, []).extend(slots)
+        self._slots.extend(values)
+
+    def delete(self, value):
+        positions = self._positions.get(value)
+        if positions is None:
+            return  # Value not found, do nothing
+        self._slots[positions.pop(0)] = _DELETED
+        if not positions:
+            del self._positions[value]
+        self._deleted += 1
+        if 2 * self._deleted > len(self._slots):
+            self._compact()
+
+    def search(self, value):
+        return value in self._positions
+
+    def _compact(self):
+        """Drops the empty slots and rebuilds the index, in O(n) once every n / 2 deletes."""
+        values = self.array
+        self._slots = []
+        self._positions = {}
+        self._deleted = 0
+        self.insert_many(values)
+
+
+# 2. Queue (ring buffer)
+class Queue:
+    """FIFO queue on a ring buffer, enqueue and dequeue are O(1) amortized.
+    With a capacity, enqueueing on a full queue follows the overflow policy: 'error' raises
+    OverflowError, 'drop_oldest' drops the oldest values to make room, 'drop_newest' drops the new ones."""
+    OVERFLOW_POLICIES = ('error', 'drop_oldest', 'drop_newest')
+    INITIAL_SIZE = 8
+
+    def __init__(self, capacity=None, overflow='error'):
+        if capacity is not None and capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        if overflow not in self.OVERFLOW_POLICIES:
+            raise ValueError(f"overflow must be one of {', '.join(self.OVERFLOW_POLICIES)}")
+        self.capacity = capacity
+        self.overflow = overflow
+        self._buffer = [None] * (capacity if capacity is not None else self.INITIAL_SIZE)
+        self._head = 0  # Index of the oldest value
+        self._size = 0
+
+    def __len__(self):
+        return self._size
 
     def enqueue(self, value):
-        self.queue.append(value)
+        if self._size == len(self._buffer):
+            if self.capacity is None:
+                self._resize(2 * self._size)
+            elif self.overflow == 'error':
+                raise OverflowError("queue is full")
+            elif self.overflow == 'drop_newest':
+                return
+            else:
+                self.dequeue()
+        self._buffer[(self._head + self._size) % len(self._buffer)] = value
+        self._size += 1
+
+    def enqueue_many(self, values):
+        """Enqueues values in order, copying them into the buffer in at most two slices.
+        A bounded queue that cannot take them all raises OverflowError before enqueueing any."""
+        values = list(values)
+        if self.capacity is None:
+            if self._size + len(values) > len(self._buffer):
+                self._resize(max(2 * len(self._buffer), self._size + len(values)))
+        else:
+            free = self.capacity - self._size
+            if len(values) > free:
+                if self.overflow == 'error':
+                    raise OverflowError("queue is full")
+                if self.overflow == 'drop_newest':
+                    values = values[:free]
+                elif len(values) >= self.capacity:
+                    # Only the newest values fit
+                    values = values[len(values) - self.capacity:]
+                    self.dequeue_many(self._size)
+                else:
+                    self.dequeue_many(len(values) - free)
+
+        size = len(self._buffer)
+        start = (self._head + self._size) % size
+        first = min(len(values), size - start)
+        self._buffer[start:start + first] = values[:first]
+        self._buffer[:len(values) - first] = values[first:]
+        self._size += len(values)
 
     def dequeue(self):
-        if not self.is_empty():
-            return self.queue.pop(0)
-        return None
+        if self.is_empty():
+            return None
+        value = self._buffer[self._head]
+        self._buffer[self._head] = None  # Do not keep dequeued values alive
+        self._head = (self._head + 1) % len(self._buffer)
+        self._size -= 1
+        return value
+
+    def dequeue_many(self, count):
+        """Dequeues up to count values, oldest first, as a list."""
+        if count < 0:
+            raise ValueError("count must not be negative")
+        count = min(count, self._size)
+        size = len(self._buffer)
+        first = min(count, size - self._head)
+        values = self._buffer[self._head:self._head + first] + self._buffer[:count - first]
+        self._buffer[self._head:self._head + first] = [None] * first
+        self._buffer[:count - first] = [None] * (count - first)
+        self._head = (self._head + count) % size
+        self._size -= count
+        return values
 
     def is_empty(self):
-        return len(self.queue) == 0
+        return self._size == 0
+
+    def _resize(self, size):
+        """Moves the values, oldest first, to the start of a buffer of the given size."""
+        values = self._buffer[self._head:self._head + self._size]
+        values += self._buffer[:self._size - len(values)]
+        self._buffer = values + [None] * (size - self._size)
+        self._head = 0
 
 
 # 3. Binary Search Tree
+from typing import TypeVar
+
+# Keys and data held by the nodes: any value, comparable ones for the search tree
+T = TypeVar('T')
+
+
 class Node:
-    def __init__(self, key):
-        self.left = None
-        self.right = None
+    __slots__ = ('left', 'right', 'value', 'height', 'size')
+
+    def __init__(self, key: T, left: 'Node | None' = None, right: 'Node | None' = None):
+        self.left = left
+        self.right = right
         self.value = key
+        self.height = 1 + max(_height(left), _height(right))
+        self.size = 1 + _size(left) + _size(right)  # Number of nodes of the subtree
+
+
+def _height(node):
+    return node.height if node is not None else 0
+
+
+def _size(node):
+    return node.size if node is not None else 0
+
 
 class BinarySearchTree:
-    def __init__(self):
+    """Binary search tree, equal keys go to the right. Insert, search and delete are iterative.
+    In balanced mode the tree is kept an AVL tree by rotations, so that sorted insertions still
+    give a tree of logarithmic height. Nodes hold the size of their subtree for the order statistics,
+    which run in O(height), O(log n) in balanced mode, plus O(k) when they return k keys."""
+
+    def __init__(self, balanced=False):
         self.root = None
+        self.balanced = balanced
+
+    @classmethod
+    def from_sorted(cls, keys, balanced=True):
+        """Builds a perfectly balanced tree from keys in ascending order, in O(n)."""
+        keys = list(keys)
+        if any(keys[i] > keys[i + 1] for i in range(len(keys) - 1)):
+            raise ValueError("keys must be sorted in ascending order")
+
+        def build(low, high):
+            # Recursion depth is the height of the tree, O(log n)
+            if low >= high:
+                return None
+            middle = (low + high) // 2
+            return Node(keys[middle], build(low, middle), build(middle + 1, high))
+
+        tree = cls(balanced)
+        tree.root = build(0, len(keys))
+        return tree
 
     def insert(self, key):
         if self.root is None:
             self.root = Node(key)
+            return
+        path = []
+        node = self.root
+        while node is not None:
+            path.append(node)
+            node = node.left if key < node.value else node.right
+        parent = path[-1]
+        if key < parent.value:
+            parent.left = Node(key)
         else:
-            self._insert(self.root, key)
+            parent.right = Node(key)
+        # Counted once the key is in, a key that cannot be compared leaves the sizes unchanged
+        for node in path:
+            node.size += 1
+        self._retrace(path)
+
+    def search(self, key):
+        node = self.root
+        while node is not None:
+            if node.value == key:
+                return node
+            node = node.left if key < node.value else node.right
+        return None
 
-    def _insert(self, root, key):
-        if key < root.value:
-            if root.left is None:
-                root.left = Node(key)
+    def delete(self, key):
+        """Removes one node holding key, if any."""
+        path = []
+        node = self.root
+        while node is not None and node.value != key:
+            path.append(node)
+            node = node.left if key < node.value else node.right
+        if node is None:
+            return  # Key not found, do nothing
+
+        if node.left is not None and node.right is not None:
+            # Replace the key by its successor, then remove the successor node instead
+            path.append(node)
+            successor = node.right
+            while successor.left is not None:
+                path.append(successor)
+                successor = successor.left
+            node.value = successor.value
+            node = successor
+
+        child = node.left if node.left is not None else node.right
+        self._replace_child(path[-1] if path else None, node, child)
+        for ancestor in path:
+            ancestor.size -= 1
+        self._retrace(path)
+
+    def __len__(self):
+        return _size(self.root)
+
+    def __iter__(self):
+        return self.keys()
+
+    def keys(self, low=None, high=None):
+        """Yields the keys between low and high included, in ascending order, without recursion.
+        A bound of None leaves that side open."""
+        stack = []
+        node = self.root
+        while stack or node is not None:
+            while node is not None:
+                if low is not None and node.value < low:
+                    node = node.right  # The left subtree is below low too
+                else:
+                    stack.append(node)
+                    node = node.left
+            if not stack:
+                return
+            node = stack.pop()
+            if high is not None and node.value > high:
+                return
+            yield node.value
+            node = node.right
+
+    def count(self, low, high):
+        """Returns the number of keys between low and high included."""
+        if high < low:
+            return 0
+        return self._count_below(high, inclusive=True) - self._count_below(low, inclusive=False)
+
+    def select(self, k):
+        """Returns the k-th smallest key, counting from 0."""
+        if not 0 <= k < len(self):
+            raise IndexError(f"select index {k} out of range for {len(self)} keys")
+        node = self.root
+        while True:
+            left_size = _size(node.left)
+            if k < left_size:
+                node = node.left
+            elif k == left_size:
+                return node.value
             else:
-                self._insert(root.left, key)
+                k -= left_size + 1
+                node = node.right
+
+    def rank(self, key):
+        """Returns the number of keys smaller than key, its index in sorted order when present."""
+        return self._count_below(key, inclusive=False)
+
+    def _count_below(self, key, inclusive):
+        # Keys equal to a node may be on both sides of it once rotated
+        count = 0
+        node = self.root
+        while node is not None:
+            if node.value < key or (inclusive and node.value == key):
+                count += _size(node.left) + 1
+                node = node.right
+            else:
+                node = node.left
+        return count
+
+    def _replace_child(self, parent, old, new):
+        if parent is None:
+            self.root = new
+        elif parent.left is old:
+            parent.left = new
         else:
-            if root.right is None:
-                root.right = Node(key)
+            parent.right = new
+
+    def _retrace(self, path):
+        """Updates the heights of a path from the root after a change below its last node, bottom up,
+        rotating the unbalanced nodes in balanced mode."""
+        for i in range(len(path) - 1, -1, -1):
+            node = path[i]
+            height = node.height
+            if self.balanced:
+                subtree = self._rebalance(node)
             else:
-                self._insert(root.right, key)
-
-    def search(self, key):
-        return self._search(self.root, key)
-
-    def _search(self, root, key):
-        if root is None:
-            return None
-        if root.value == key:
-            return root
-        if key < root.value:
-            return self._search(root.left, key)
-        return self._search(root.right, key)
+                self._update(node)
+                subtree = node
+            if subtree is not node:
+                self._replace_child(path[i - 1] if i > 0 else None, node, subtree)
+            elif node.height == height:
+                break  # The nodes above are unchanged
+
+    @staticmethod
+    def _update(node):
+        node.height = 1 + max(_height(node.left), _height(node.right))
+        node.size = 1 + _size(node.left) + _size(node.right)
+
+    def _rotate_left(self, node):
+        pivot = node.right
+        node.right = pivot.left
+        pivot.left = node
+        self._update(node)
+        self._update(pivot)
+        return pivot
+
+    def _rotate_right(self, node):
+        pivot = node.left
+        node.left = pivot.right
+        pivot.right = node
+        self._update(node)
+        self._update(pivot)
+        return pivot
+
+    def _rebalance(self, node):
+        """Returns the root of the subtree of node once its heights differ by at most one."""
+        self._update(node)
+        balance = _height(node.left) - _height(node.right)
+        if balance > 1:
+            if _height(node.left.left) < _height(node.left.right):
+                node.left = self._rotate_left(node.left)
+            return self._rotate_right(node)
+        if balance < -1:
+            if _height(node.right.right) < _height(node.right.left):
+                node.right = self._rotate_right(node.right)
+            return self._rotate_left(node)
+        return node
 
 
 # 4. Linked List
 class LinkedListNode:
-    def __init__(self, data):
+    __slots__ = ('data', 'next')
+
+    def __init__(self, data: T, next_node: 'LinkedListNode | None' = None):
         self.data = data
-        self.next = None
+        self.next = next_node
 
 class LinkedList:
     def __init__(self):
@@ -112,6 +448,83 @@ class LinkedList:
             prev.next = current.next
 
 
+import array
+
+# Index of the missing node in a NodePool, as None for node objects
+NULL = -1
+
+
+class NodePool:
+    """Stores numeric nodes as rows of array.array columns, a node being its row index: one column
+    of keys of the given typecode, and one column of node indexes per link. A node takes a few machine
+    words instead of an object. Freed rows are chained through the first link and reused."""
+
+    def __init__(self, typecode='q', links=('next',)):
+        self.keys = array.array(typecode)
+        self.links = {name: array.array('q') for name in links}
+        self._free_link = self.links[links[0]]
+        self._free = NULL  # First freed row
+        self._freed = 0
+
+    def __len__(self):
+        return len(self.keys) - self._freed
+
+    def new(self, key, **links):
+        """Returns the index of a new node, with the links that are not given set to NULL."""
+        if self._free != NULL:
+            index = self._free
+            self._free = self._free_link[index]
+            self._freed -= 1
+            self.keys[index] = key
+            for name, column in self.links.items():
+                column[index] = links.get(name, NULL)
+            return index
+        self.keys.append(key)
+        for name, column in self.links.items():
+            column.append(links.get(name, NULL))
+        return len(self.keys) - 1
+
+    def free(self, index):
+        self._free_link[index] = self._free
+        self._free = index
+        self._freed += 1
+
+
+class PooledLinkedList:
+    """LinkedList of numeric keys whose nodes live in a NodePool, for lists of millions of keys."""
+
+    def __init__(self, typecode='q'):
+        self.pool = NodePool(typecode)
+        self.head = NULL
+
+    def insert(self, data):
+        self.head = self.pool.new(data, next=self.head)
+
+    def search(self, key):
+        keys, next_nodes = self.pool.keys, self.pool.links['next']
+        current = self.head
+        while current != NULL:
+            if keys[current] == key:
+                return True
+            current = next_nodes[current]
+        return False
+
+    def delete(self, key):
+        keys, next_nodes = self.pool.keys, self.pool.links['next']
+        current = self.head
+        prev = NULL
+        while current != NULL and keys[current] != key:
+            prev = current
+            current = next_nodes[current]
+        if current == NULL:
+            return  # Key not found, do nothing
+        if prev == NULL:
+            self.head = next_nodes[current]
+        else:
+            next_nodes[prev] = next_nodes[current]
+        self.pool.free(current)
+
+
 # 5. Hashed Tree (Merkle Tree)
 import hashlib
 
@@ -175,9 +588,11 @@ class Graph:
 
 # 8. Tree (Generic Tree)
 class TreeNode:
-    def __init__(self, data):
+    __slots__ = ('data', 'children')
+
+    def __init__(self, data: T, children: 'list[TreeNode] | None' = None):
         self.data = data
-        self.children = []
+        self.children = children if children is not None else []
 
     def add_child(self, child):
         self.children.append(child)
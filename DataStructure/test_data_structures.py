@@ -8,6 +8,9 @@ def generate_tests():
     test_file = open("test_main.py", "w")
     test_file.write("import hypothesis.strategies as st\n")
     test_file.write("from hypothesis import given\n")
+    test_file.write("from collections import deque\n")
+    test_file.write("import bisect\n")
+    test_file.write("import pytest\n")
     test_file.write("from main import *\n\n")
 
     test_file.write("@given(st.lists(st.integers()))\n")
@@ -82,7 +85,188 @@ def generate_tests():
     test_file.write("    for value in tree_values[1:]:\n")
     test_file.write("        tree.root.add_child(TreeNode(value))\n")
     test_file.write("    for value in tree_values:\n")
-    test_file.write("        assert tree.search(tree.root, value) is not None\n")
+    test_file.write("        assert tree.search(tree.root, value) is not None\n\n")
+
+    test_file.write("@given(st.one_of(st.none(), st.integers(min_value=1, max_value=8)), st.sampled_from(Queue.OVERFLOW_POLICIES),\n")
+    test_file.write("       st.lists(st.tuples(st.sampled_from(['enqueue', 'enqueue_many', 'dequeue', 'dequeue_many']),\n")
+    test_file.write("                          st.lists(st.integers(), max_size=10), st.integers(min_value=0, max_value=10))))\n")
+    test_file.write("def test_Queue_matches_deque(capacity, overflow, operations):\n")
+    test_file.write("    # Small capacities and the initial buffer of 8 make the values wrap around the end of the buffer\n")
+    test_file.write("    queue = Queue(capacity, overflow)\n")
+    test_file.write("    model = deque()\n")
+    test_file.write("    for operation, values, count in operations:\n")
+    test_file.write("        if operation == 'enqueue' and not values:\n")
+    test_file.write("            continue\n")
+    test_file.write("        if operation == 'enqueue':\n")
+    test_file.write("            values = values[:1]\n")
+    test_file.write("        if operation.startswith('enqueue'):\n")
+    test_file.write("            full = capacity is not None and len(model) + len(values) > capacity\n")
+    test_file.write("            add = queue.enqueue_many if operation == 'enqueue_many' else lambda values: queue.enqueue(values[0])\n")
+    test_file.write("            if full and overflow == 'error':\n")
+    test_file.write("                with pytest.raises(OverflowError):\n")
+    test_file.write("                    add(values)\n")
+    test_file.write("                continue\n")
+    test_file.write("            add(values)\n")
+    test_file.write("            if full and overflow == 'drop_newest':\n")
+    test_file.write("                model.extend(values[:capacity - len(model)])\n")
+    test_file.write("            else:\n")
+    test_file.write("                model.extend(values)\n")
+    test_file.write("                while capacity is not None and len(model) > capacity:\n")
+    test_file.write("                    model.popleft()\n")
+    test_file.write("        elif operation == 'dequeue':\n")
+    test_file.write("            assert queue.dequeue() == (model.popleft() if model else None)\n")
+    test_file.write("        else:\n")
+    test_file.write("            assert queue.dequeue_many(count) == [model.popleft() for _ in range(min(count, len(model)))]\n")
+    test_file.write("        assert len(queue) == len(model)\n")
+    test_file.write("        assert queue.is_empty() == (not model)\n")
+    test_file.write("    assert queue.dequeue_many(len(model)) == list(model)\n\n")
+
+    test_file.write("def test_Queue_dequeue_many_negative_count():\n")
+    test_file.write("    queue = Queue()\n")
+    test_file.write("    queue.enqueue_many([1, 2, 3])\n")
+    test_file.write("    with pytest.raises(ValueError):\n")
+    test_file.write("        queue.dequeue_many(-2)\n")
+    test_file.write("    assert queue.dequeue_many(3) == [1, 2, 3]\n\n")
+
+    test_file.write("@given(st.lists(st.tuples(st.sampled_from(['insert', 'insert_many', 'delete', 'search']),\n")
+    test_file.write("                          st.lists(st.integers(min_value=0, max_value=9), min_size=1, max_size=5))))\n")
+    test_file.write("def test_IndexedArray_matches_Array(operations):\n")
+    test_file.write("    # Few distinct values, so that duplicates are deleted one occurrence at a time and slots get compacted\n")
+    test_file.write("    indexed, model = IndexedArray(), Array()\n")
+    test_file.write("    for operation, values in operations:\n")
+    test_file.write("        if operation == 'insert_many':\n")
+    test_file.write("            indexed.insert_many(iter(values))\n")
+    test_file.write("            model.insert_many(values)\n")
+    test_file.write("        elif operation == 'search':\n")
+    test_file.write("            assert indexed.search(values[0]) == model.search(values[0])\n")
+    test_file.write("        else:\n")
+    test_file.write("            getattr(indexed, operation)(values[0])\n")
+    test_file.write("            getattr(model, operation)(values[0])\n")
+    test_file.write("        assert indexed.array == model.array\n")
+    test_file.write("        assert list(indexed) == model.array\n")
+    test_file.write("        assert len(indexed) == len(model.array)\n\n")
+
+    test_file.write("def test_IndexedArray_insert_many_unhashable():\n")
+    test_file.write("    # A failed insert_many leaves the array and its index unchanged\n")
+    test_file.write("    indexed = IndexedArray()\n")
+    test_file.write("    indexed.insert(1)\n")
+    test_file.write("    with pytest.raises(TypeError):\n")
+    test_file.write("        indexed.insert_many([2, [3]])\n")
+    test_file.write("    assert indexed.array == [1] and not indexed.search(2)\n")
+    test_file.write("    indexed.delete(1)\n")
+    test_file.write("    assert indexed.array == [] and not indexed.search(1)\n\n")
+
+    test_file.write("def checked_height(node, balanced, low=None, high=None):\n")
+    test_file.write("    # Checks the key order and the stored heights of a subtree, and the AVL balance in balanced mode\n")
+    test_file.write("    if node is None:\n")
+    test_file.write("        return 0\n")
+    test_file.write("    assert (low is None or low <= node.value) and (high is None or node.value <= high)\n")
+    test_file.write("    left = checked_height(node.left, balanced, low, node.value)\n")
+    test_file.write("    right = checked_height(node.right, balanced, node.value, high)\n")
+    test_file.write("    assert node.height == 1 + max(left, right)\n")
+    test_file.write("    assert not balanced or abs(left - right) <= 1\n")
+    test_file.write("    return node.height\n\n")
+
+    test_file.write("def in_order(node):\n")
+    test_file.write("    return in_order(node.left) + [node.value] + in_order(node.right) if node else []\n\n")
+
+    test_file.write("@given(st.booleans(), st.lists(st.tuples(st.booleans(), st.integers(min_value=0, max_value=20))))\n")
+    test_file.write("def test_BinarySearchTree_insert_delete(balanced, operations):\n")
+    test_file.write("    tree = BinarySearchTree(balanced)\n")
+    test_file.write("    model = []\n")
+    test_file.write("    for insert, key in operations:\n")
+    test_file.write("        if insert:\n")
+    test_file.write("            tree.insert(key)\n")
+    test_file.write("            model.append(key)\n")
+    test_file.write("        else:\n")
+    test_file.write("            tree.delete(key)\n")
+    test_file.write("            if key in model:\n")
+    test_file.write("                model.remove(key)\n")
+    test_file.write("        assert (tree.search(key) is not None) == (key in model)\n")
+    test_file.write("        checked_height(tree.root, balanced)\n")
+    test_file.write("    assert in_order(tree.root) == sorted(model)\n\n")
+
+    test_file.write("def test_BinarySearchTree_sorted_inserts_stay_balanced():\n")
+    test_file.write("    tree = BinarySearchTree(balanced=True)\n")
+    test_file.write("    for key in range(5000):\n")
+    test_file.write("        tree.insert(key)\n")
+    test_file.write("    # An AVL tree of n nodes is less than 1.45 log2(n) high\n")
+    test_file.write("    assert checked_height(tree.root, True) <= 18\n")
+    test_file.write("    assert tree.search(4999) is not None\n\n")
+
+    test_file.write("@given(st.lists(st.integers()))\n")
+    test_file.write("def test_BinarySearchTree_from_sorted(keys):\n")
+    test_file.write("    tree = BinarySearchTree.from_sorted(sorted(keys))\n")
+    test_file.write("    assert checked_height(tree.root, True) == len(keys).bit_length()\n")
+    test_file.write("    assert in_order(tree.root) == sorted(keys)\n")
+    test_file.write("    with pytest.raises(ValueError):\n")
+    test_file.write("        BinarySearchTree.from_sorted([2, 1])\n\n")
+
+    test_file.write("def checked_size(node):\n")
+    test_file.write("    # Checks the stored subtree sizes and returns the size of the subtree\n")
+    test_file.write("    if node is None:\n")
+    test_file.write("        return 0\n")
+    test_file.write("    assert node.size == 1 + checked_size(node.left) + checked_size(node.right)\n")
+    test_file.write("    return node.size\n\n")
+
+    test_file.write("@given(st.booleans(), st.lists(st.tuples(st.booleans(), st.integers(min_value=0, max_value=20))),\n")
+    test_file.write("       st.integers(min_value=-2, max_value=22), st.integers(min_value=-2, max_value=22))\n")
+    test_file.write("def test_BinarySearchTree_order_statistics(balanced, operations, low, high):\n")
+    test_file.write("    tree = BinarySearchTree(balanced)\n")
+    test_file.write("    model = []\n")
+    test_file.write("    for insert, key in operations:\n")
+    test_file.write("        if insert:\n")
+    test_file.write("            tree.insert(key)\n")
+    test_file.write("            bisect.insort(model, key)\n")
+    test_file.write("        else:\n")
+    test_file.write("            tree.delete(key)\n")
+    test_file.write("            if key in model:\n")
+    test_file.write("                model.remove(key)\n")
+    test_file.write("        checked_size(tree.root)\n")
+    test_file.write("        assert len(tree) == len(model)\n")
+    test_file.write("        assert tree.rank(key) == bisect.bisect_left(model, key)\n")
+    test_file.write("    assert list(tree) == model\n")
+    test_file.write("    assert [tree.select(k) for k in range(len(model))] == model\n")
+    test_file.write("    with pytest.raises(IndexError):\n")
+    test_file.write("        tree.select(len(model))\n")
+    test_file.write("    in_range = [key for key in model if low <= key <= high]\n")
+    test_file.write("    assert list(tree.keys(low, high)) == in_range\n")
+    test_file.write("    assert list(tree.keys(low)) == [key for key in model if low <= key]\n")
+    test_file.write("    assert list(tree.keys(high=high)) == [key for key in model if key <= high]\n")
+    test_file.write("    assert tree.count(low, high) == len(in_range)\n")
+    test_file.write("    if model:\n")
+    test_file.write("        # A key that cannot be compared leaves the tree unchanged\n")
+    test_file.write("        with pytest.raises(TypeError):\n")
+    test_file.write("            tree.insert('x')\n")
+    test_file.write("        checked_size(tree.root)\n")
+    test_file.write("        assert len(tree) == len(model)\n")
+    test_file.write("        assert [tree.select(k) for k in range(len(model))] == model\n\n")
+
+    test_file.write("@given(st.lists(st.tuples(st.sampled_from(['insert', 'delete', 'search']), st.integers(min_value=0, max_value=9))))\n")
+    test_file.write("def test_PooledLinkedList_matches_LinkedList(operations):\n")
+    test_file.write("    pooled, model = PooledLinkedList(), LinkedList()\n")
+    test_file.write("    peak = 0\n")
+    test_file.write("    for operation, key in operations:\n")
+    test_file.write("        if operation == 'search':\n")
+    test_file.write("            assert pooled.search(key) == model.search(key)\n")
+    test_file.write("        else:\n")
+    test_file.write("            getattr(pooled, operation)(key)\n")
+    test_file.write("            getattr(model, operation)(key)\n")
+    test_file.write("        peak = max(peak, len(pooled.pool))\n")
+    test_file.write("    expected = []\n")
+    test_file.write("    node = model.head\n")
+    test_file.write("    while node is not None:\n")
+    test_file.write("        expected.append(node.data)\n")
+    test_file.write("        node = node.next\n")
+    test_file.write("    keys = []\n")
+    test_file.write("    index = pooled.head\n")
+    test_file.write("    while index != NULL:\n")
+    test_file.write("        keys.append(pooled.pool.keys[index])\n")
+    test_file.write("        index = pooled.pool.links['next'][index]\n")
+    test_file.write("    assert keys == expected\n")
+    test_file.write("    # Deleted rows are reused, so the pool only grows up to the most nodes alive at once\n")
+    test_file.write("    assert len(pooled.pool) == len(expected)\n")
+    test_file.write("    assert len(pooled.pool.keys) == peak\n\n")
 
     test_file.close()
 
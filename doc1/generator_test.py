@@ -122,9 +122,7 @@ def type_to_strategy(annotation, visited_types=None):
 
 
 def generate_test(func_name, func, class_name=None):
-    global generated_code
-    global return_type_check
-
+    """Builds the Hypothesis test of one function or method from its type hints."""
     params = ', '.join(type_to_strategy(param[1]) for param in func.items() if param[0] != 'return')
     args = ', '.join(param[0] for param in func.items() if param[0] != 'return')
     return_type = func.get('return', None)
@@ -154,6 +152,7 @@ def test_{class_name}_{func_name}({args}):
     result = instance.{func_name}({args})
     {return_type_check}
 """
+        return generated_code
     else: # Function at module level
 
         # if no parameter with return type
@@ -166,7 +165,7 @@ def test_{func_name}({args}):
     result = {func_name}()
     {return_type_check}
 """
-        return generated_code
+            return generated_code
 
     # for standart fonction
     generated_code = f"""
@@ -179,7 +178,6 @@ def test_{func_name}({args}):
 
 
 def main():
-    global test_code
     module_name = 'mytest'
     file_path = 'mytest.py'
     spec = importlib.util.spec_from_file_location(module_name, file_path)
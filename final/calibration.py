@@ -0,0 +1,75 @@
+"""Times a few examples of each generated test to give it @settings that fit a wall-clock budget."""
+import contextlib
+import io
+import time
+
+from hypothesis import settings, HealthCheck, Phase
+
+from runner import load_module, collect_tests
+
+CALIBRATION_EXAMPLES = 5
+MIN_EXAMPLES = 10
+MAX_EXAMPLES = 1000
+MIN_DEADLINE_MS = 200
+# How much slower than measured an example may be before Hypothesis reports it
+DEADLINE_FACTOR = 10
+
+
+def time_per_example(test, examples=CALIBRATION_EXAMPLES):
+    """Runs a few generated examples of a test and returns the mean seconds per example."""
+    calibration = settings(max_examples=examples, phases=[Phase.generate], database=None, deadline=None,
+                           suppress_health_check=list(HealthCheck))
+    start = time.perf_counter()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            calibration(test)()
+    except Exception:
+        pass  # Failures are reported by the real run
+    return (time.perf_counter() - start) / examples
+
+
+def calibrated_settings(seconds_per_example, budget_per_test):
+    """Returns the (max_examples, deadline in ms) that fit a test into its share of the budget."""
+    max_examples = int(budget_per_test / max(seconds_per_example, 1e-6))
+    max_examples = min(max(max_examples, MIN_EXAMPLES), MAX_EXAMPLES)
+    deadline = max(MIN_DEADLINE_MS, round(seconds_per_example * 1000 * DEADLINE_FACTOR))
+    return max_examples, deadline
+
+
+def strip_settings(code):
+    return '\n'.join(line for line in code.split('\n') if not line.startswith('@settings('))
+
+
+def has_given(code):
+    """State machine tests have no @given and keep the settings of the run."""
+    return any(line.startswith('@given(') for line in code.split('\n'))
+
+
+def with_settings(code, max_examples, deadline):
+    """Puts @settings(max_examples=..., deadline=...) on a generated test, replacing a previous calibration."""
+    lines = strip_settings(code).split('\n')
+    index = next(i for i, line in enumerate(lines) if line.startswith('@given('))
+    lines.insert(index, f"@settings(max_examples={max_examples}, deadline={deadline})")
+    return '\n'.join(lines)
+
+
+def calibrate(generated, budget, selected):
+    """Calibrates the selected tests of every generated module so that the whole run fits budget seconds.
+    selected maps a module name to the names of its tests that will run, or None for all of them."""
+    def will_run(result, test):
+        names = selected[result.module_name]
+        return (names is None or test.name in names) and has_given(test.code)
+
+    total = sum(will_run(result, test) for result in generated for test in result.tests)
+    calibrated = []
+    for result in generated:
+        module = load_module(result.file_path, result.module_name)
+        tests = dict(collect_tests(strip_settings(result.test_code), module))
+        calibrated_tests = []
+        for test in result.tests:
+            if will_run(result, test):
+                max_examples, deadline = calibrated_settings(time_per_example(tests[test.name]), budget / total)
+                test = test._replace(code=with_settings(test.code, max_examples, deadline))
+            calibrated_tests.append(test)
+        calibrated.append(result._replace(tests=calibrated_tests))
+    return calibrated
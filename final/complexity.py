@@ -0,0 +1,272 @@
+"""Measures how the running time of a function or method grows with the size of its input,
+and checks it against a declared or previously measured complexity class."""
+import inspect
+import json
+import math
+import random
+import statistics
+import string
+import time
+import types
+from collections import deque, abc
+from typing import get_type_hints, get_origin, get_args, Any, TypeVar, Union, Literal
+
+# Complexity classes from the slowest growing, as (name, growth function, polynomial degree)
+COMPLEXITY_CLASSES = [
+    ('O(1)', lambda n: 1.0, 0),
+    ('O(log n)', lambda n: math.log2(n), 0),
+    ('O(n)', lambda n: n, 1),
+    ('O(n log n)', lambda n: n * math.log2(n), 1),
+    ('O(n^2)', lambda n: n * n, 2),
+]
+DEGREES = {name: degree for name, _, degree in COMPLEXITY_CLASSES}
+ORDER = {name: index for index, (name, _, _) in enumerate(COMPLEXITY_CLASSES)}
+
+# Input sizes, each twice the previous one. They sit between powers of two, so that containers
+# doubling their storage do not all resize during the timed calls
+SIZES = tuple(3 * 2 ** exponent for exponent in range(9, 16))
+# Larger sizes are skipped once a size takes longer than this, as long as MIN_SIZES were measured
+MAX_SECONDS_PER_SIZE = 1.0
+MIN_SIZES = 4
+# Each size is timed at least REPEATS times, and until the timed runs add up to MIN_SECONDS_PER_SIZE
+REPEATS = 5
+MIN_SECONDS_PER_SIZE = 0.05
+# Function calls are timed in batches of at least this long, so that the timer resolution does not matter
+MIN_BATCH_SECONDS = 0.005
+# Timed calls of a method per element of the instance it is called on, amortizing resizes and rebalancing
+METHOD_CALLS_PER_ELEMENT = 0.5
+# Runs that must measure the same class before it becomes the baseline of a target
+BASELINE_RUNS = 3
+# Size of the elements of a sized input, and of the arguments of a timed method
+ELEMENT_SIZE = 8
+
+# Methods that add one element, used to grow an instance to a given size
+GROW_METHODS = ('insert', 'append', 'add', 'push', 'enqueue', 'put')
+
+# Complexity class measured for each target in this process, by (module name, Class.method or function name)
+measured = {}
+
+
+def fit(sizes, seconds):
+    """Returns the name of the complexity class that best explains the timings: the one whose growth
+    function leaves the least spread in log(seconds / f(n))."""
+    def spread(growth):
+        return statistics.pstdev(math.log(max(elapsed, 1e-12) / growth(size))
+                                 for size, elapsed in zip(sizes, seconds))
+    return min(COMPLEXITY_CLASSES, key=lambda complexity_class: spread(complexity_class[1]))[0]
+
+
+def exceeds(measured_class, expected_class):
+    """Tells whether a measured class grows polynomially faster than the expected one. Classes that only
+    differ by a log factor cannot be told apart reliably from timings, so they are not failures."""
+    return DEGREES[measured_class] > DEGREES[expected_class]
+
+
+def is_sized(annotation):
+    """Tells whether values of an annotation have a size that inputs can be grown by."""
+    origin = get_origin(annotation) or annotation
+    if origin in (Union, types.UnionType):
+        return any(is_sized(arg) for arg in get_args(annotation) if arg is not type(None))
+    if hasattr(annotation, '__supertype__'):  # NewType
+        return is_sized(annotation.__supertype__)
+    return origin in (str, bytes, list, tuple, set, frozenset, dict, deque) or (
+        isinstance(origin, type) and issubclass(origin, (abc.Sequence, abc.Set, abc.Mapping)))
+
+
+def is_buildable(annotation):
+    """Tells whether sized_value() builds values of an annotation. Unannotated parameters are not:
+    they would get an int whatever the target expects."""
+    if annotation is None:
+        return False
+    if hasattr(annotation, '__supertype__'):  # NewType
+        return is_buildable(annotation.__supertype__)
+    if annotation is Any or isinstance(annotation, TypeVar):
+        return True
+    origin = get_origin(annotation) or annotation
+    args = get_args(annotation)
+    if origin in (Union, types.UnionType):
+        return is_buildable(next((arg for arg in args if arg is not type(None)), None))
+    if origin in (Literal, bool, int, float, str, bytes):
+        return True
+    if origin is tuple and args and args[-1] is not Ellipsis:
+        return all(is_buildable(arg) for arg in args)
+    if origin in (dict, abc.Mapping, abc.MutableMapping, list, tuple, set, frozenset, deque,
+                  abc.Sequence, abc.MutableSequence, abc.Set):
+        return all(is_buildable(arg) for arg in args if arg is not Ellipsis)
+    return False
+
+
+def sized_value(annotation, size, rng):
+    """Builds a value of an annotation with size elements, or characters. Scalars ignore size."""
+    if hasattr(annotation, '__supertype__'):  # NewType
+        return sized_value(annotation.__supertype__, size, rng)
+    origin = get_origin(annotation) or annotation
+    args = get_args(annotation)
+    if origin in (Union, types.UnionType):
+        return sized_value(next((arg for arg in args if arg is not type(None)), int), size, rng)
+    if origin is Literal:
+        return args[0]
+    if origin is bool:
+        return rng.random() < 0.5
+    if origin is float:
+        return rng.uniform(-1e6, 1e6)
+    if origin is str:
+        return ''.join(rng.choices(string.ascii_letters, k=size))
+    if origin is bytes:
+        return rng.randbytes(size)
+    if origin is tuple and args and args[-1] is not Ellipsis:
+        return tuple(sized_value(arg, ELEMENT_SIZE, rng) for arg in args)
+    if origin in (dict, abc.Mapping, abc.MutableMapping):
+        key_type, value_type = args or (int, int)
+        return {sized_value(key_type, ELEMENT_SIZE, rng): sized_value(value_type, ELEMENT_SIZE, rng)
+                for _ in range(size)}
+    if origin in (list, tuple, set, frozenset, deque) or origin in (abc.Sequence, abc.MutableSequence, abc.Set):
+        elements = [sized_value(args[0] if args else int, ELEMENT_SIZE, rng) for _ in range(size)]
+        return (list if origin in (abc.Sequence, abc.MutableSequence) else
+                set if origin is abc.Set else origin)(elements)
+    # int, Any and unannotated parameters
+    return rng.randint(-2 ** 31, 2 ** 31 - 1)
+
+
+def function_arguments(function, size, rng):
+    """Builds the arguments of a function for an input of the given size. Collections and strings get
+    size elements; without any, numbers are set to size, as for factorial(n)."""
+    type_hints = get_type_hints(function)
+    # Optional and variadic parameters keep their defaults
+    parameters = [name for name, parameter in inspect.signature(function).parameters.items()
+                  if parameter.default is inspect.Parameter.empty
+                  and parameter.kind in (parameter.POSITIONAL_ONLY, parameter.POSITIONAL_OR_KEYWORD)]
+    sized = any(is_sized(type_hints.get(name)) for name in parameters)
+    arguments = []
+    for name in parameters:
+        annotation = type_hints.get(name)
+        if sized or annotation not in (int, float):
+            arguments.append(sized_value(annotation, size if is_sized(annotation) else ELEMENT_SIZE, rng))
+        else:
+            arguments.append(annotation(size))
+    return arguments
+
+
+def grown_instance(owner, grow, size, rng):
+    """Builds an instance of owner and calls its grow method with size random elements."""
+    # The first parameter of __init__ is self
+    instance = owner(*function_arguments(owner.__init__, ELEMENT_SIZE, rng)[1:])
+    grow_method = getattr(instance, grow)
+    element_type = get_type_hints(grow_method).get(next(iter(inspect.signature(grow_method).parameters)), int)
+    for _ in range(size):
+        grow_method(sized_value(element_type, ELEMENT_SIZE, rng))
+    return instance
+
+
+def batch_time(target, arguments):
+    """Returns the seconds per call of target, called in batches growing as in timeit's autorange()
+    until a batch takes MIN_BATCH_SECONDS."""
+    calls = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(calls):
+            target(*arguments)
+        elapsed = time.perf_counter() - start
+        if elapsed >= MIN_BATCH_SECONDS:
+            return elapsed / calls
+        calls *= 2 if elapsed * 10 < MIN_BATCH_SECONDS else 5
+
+
+def amortized_time(method, size, rng):
+    """Returns the seconds per call of a bound method called about size / 2 times in a row, so that
+    occasional resizes or rebalancing are averaged over the calls."""
+    calls = max(1, int(size * METHOD_CALLS_PER_ELEMENT))
+    arguments = [function_arguments(method, ELEMENT_SIZE, rng) for _ in range(calls)]
+    start = time.perf_counter()
+    for call_arguments in arguments:
+        method(*call_arguments)
+    return (time.perf_counter() - start) / calls
+
+
+def time_at_size(target, size, rng, owner=None, grow=None):
+    """Returns the best seconds per call of target with an input of the given size, over at least
+    REPEATS runs and MIN_SECONDS_PER_SIZE of calls, unless they exceed MAX_SECONDS_PER_SIZE."""
+    best = math.inf
+    runs = 0
+    total = 0.0
+    while runs < REPEATS or total < MIN_SECONDS_PER_SIZE:
+        start = time.perf_counter()
+        if owner is None:
+            elapsed = batch_time(target, function_arguments(target, size, rng))
+        else:
+            elapsed = amortized_time(getattr(grown_instance(owner, grow, size, rng), target), size, rng)
+        best = min(best, elapsed)
+        runs += 1
+        total += time.perf_counter() - start
+        if total > MAX_SECONDS_PER_SIZE:
+            break
+    return best
+
+
+def measure(target, owner=None, grow=None, sizes=SIZES, seed=0):
+    """Times target, a function or the name of a method of owner, over growing input sizes and
+    returns its complexity class."""
+    rng = random.Random(seed)
+    measured_sizes, seconds = [], []
+    for size in sizes:
+        start = time.perf_counter()
+        seconds.append(time_at_size(target, size, rng, owner, grow))
+        measured_sizes.append(size)
+        if len(measured_sizes) >= MIN_SIZES and time.perf_counter() - start > MAX_SECONDS_PER_SIZE:
+            break
+    return fit(measured_sizes, seconds)
+
+
+def assert_complexity(target, method=None, grow=None, expected=None):
+    """Measures a function, or a method of the target class grown through its grow method, records the
+    measured class and fails when it grows faster than the expected one."""
+    if method is None:
+        name = target.__name__
+        complexity_class = measure(target)
+    else:
+        name = f"{target.__name__}.{method}"
+        complexity_class = measure(method, target, grow)
+    measured[(target.__module__, name)] = complexity_class
+    if expected is not None and exceeds(complexity_class, expected):
+        raise AssertionError(f"{name} is {complexity_class}, expected at most {expected}")
+
+
+def expected_classes(declared, baseline, module_name):
+    """Returns the {Class.method or function name: complexity class} a module is checked against.
+    Declared names may be prefixed with the module name, and win over the baseline of previous runs."""
+    expected = dict(baseline.get(module_name, {}))
+    expected.update((name, complexity_class) for name, complexity_class in declared.items()
+                    if not name.startswith(f"{module_name}."))
+    expected.update((name[len(module_name) + 1:], complexity_class) for name, complexity_class in declared.items()
+                    if name.startswith(f"{module_name}."))
+    return expected
+
+
+def load_classes(path):
+    try:
+        with open(path) as classes_file:
+            return json.load(classes_file)
+    except FileNotFoundError:
+        return {}
+
+
+def update_baseline(path, runs_path):
+    """Adds the classes measured in this process to the runs of runs_path, {module name: {name: classes
+    of the last runs}}. Once the last BASELINE_RUNS runs all measured classes of one degree, the slowest
+    becomes the baseline of path, {module name: {name: class}}, so that one noisy run is not recorded.
+    Classes already in the baseline are kept, so that a regression is reported rather than recorded."""
+    baseline = load_classes(path)
+    runs = load_classes(runs_path)
+    for (module_name, name), complexity_class in measured.items():
+        if name in baseline.get(module_name, {}):
+            continue
+        module_runs = runs.setdefault(module_name, {})
+        recent = (module_runs.get(name, []) + [complexity_class])[-BASELINE_RUNS:]
+        if len(recent) == BASELINE_RUNS and len({DEGREES[recent_class] for recent_class in recent}) == 1:
+            baseline.setdefault(module_name, {})[name] = max(recent, key=ORDER.get)
+            del module_runs[name]
+        else:
+            module_runs[name] = recent
+    for classes_path, classes in ((path, baseline), (runs_path, runs)):
+        with open(classes_path, 'w') as classes_file:
+            json.dump(classes, classes_file, indent=2, sort_keys=True)
@@ -1,146 +1,41 @@
+import argparse
 import ast
-import importlib.util
-from typing import get_type_hints, Union, Literal
-import array
+import builtins
+import contextlib
+import hashlib
+import json
+import os
+import symtable
+from concurrent.futures import ProcessPoolExecutor
+from typing import get_type_hints, Any, NamedTuple
 
 import pytest
-from strategies import type_to_strategy
+from strategies import type_to_strategy, strategy_cache, use_profile, size_profile, PROFILES
+from validators import validator
+from complexity import GROW_METHODS, is_sized, is_buildable, expected_classes, load_classes, update_baseline
+from runner import (load_module, run_in_process, run_in_pool, report, PytestResults, use_example_database,
+                    load_failures, save_failures)
+from static_hints import StaticModule, UnresolvedAnnotation
+from calibration import calibrate
+from timing import TimingCollector, test_entry, write_report
 import sys
 
 def generate_test(func_name, func, class_name=None):
-    global generated_code
-    global return_type_check
-
+    """Builds the Hypothesis test of one function or method from its type hints.
+    All the state is local to the call, so tests of several functions can be generated from threads."""
     params = ', '.join(
         type_to_strategy(param[1]) for param in func.items() if param[0] != 'return'
     )
     args = ', '.join(param[0] for param in func.items() if param[0] != 'return')
     return_type = func.get('return', None)
 
-    # Modify the return type check for NewType
-    if hasattr(return_type, '__supertype__'):  # Check for NewType
-        base_type = return_type.__supertype__
-        return_type_check = f"assert isinstance(result, {base_type.__name__})"
-
-    #For Literal
-    if hasattr(return_type, '__origin__') and return_type.__origin__ == Literal:
-        literals = ', '.join(repr(arg) for arg in return_type.__args__)
-        return_type_check = f"assert result in [{literals}]"
-
-    ####################################################################################################################
-
-    def handle_union_type_check(type_):
-        """Manages Union types to check that the element belongs to one of the specified types."""
-        if hasattr(type_, '__origin__') and type_.__origin__ == Union:
-            # Generate a check for each type in the Union
-            return " or ".join(
-                f"isinstance(element, {rtype.__name__})" for rtype in type_.__args__
-            )
-        # If it's not a Union, return a classic check
-        return f"isinstance(element, {type_.__name__})"
-    ####################################################################################################################
-
-
-
-# Union
-    if hasattr(return_type, '__origin__') and return_type.__origin__ == Union:
-        return_checks = " or ".join(
-            f"isinstance(result, {rtype.__name__})" if rtype != type(
-                None
-            ) else "result is None"
-            for rtype in return_type.__args__
-        )
-        return_type_check = f"assert {return_checks}"
-
-#dict
-
-    elif hasattr(return_type, '__origin__') and return_type.__origin__ == dict:
-        # Recursive check for nested dictionaries
-        if len(return_type.__args__) == 2:
-            key_type, value_type = return_type.__args__
-            # If the value_type is a Union, we need to handle each type in the Union
-            if hasattr(value_type, '__origin__') and value_type.__origin__ == Union:
-                # Check if the value matches one of the types in the Union
-                value_checks = " or ".join(
-                    f"isinstance(v, {rtype.__name__})" if rtype != type(None) else "v is None"
-                    for rtype in value_type.__args__
-                )
-                return_type_check = (
-                    f"assert isinstance(result, dict) and all(isinstance(k, {key_type.__name__}) and ({value_checks}) "
-                    f"for k, v in result.items())"
-                )
-            else:
-                # Handle the case where value_type is a simple type (non-Union)
-                return_type_check = (
-                    f"assert isinstance(result, dict) and all(isinstance(k, {key_type.__name__}) and "
-                    f"isinstance(v, {value_type.__name__}) for k, v in result.items())"
-                )
-
-    # tuple
-    elif hasattr(return_type, '__origin__') and return_type.__origin__ == tuple:
-    # Recursive check for nested tuples
-        if len(return_type.__args__) > 0:
-            element_types = return_type.__args__
-            # Build checks for each element in the tuple
-            return_type_check = "assert isinstance(result, tuple) and "
-            return_type_check += " and ".join(
-                f"isinstance(result[{i}], {elem_type.__name__})"
-                if not hasattr(elem_type, '__origin__') or elem_type.__origin__ != list
-                else f"isinstance(result[{i}], list) and all(isinstance(item, {elem_type.__args__[0].__name__}) for item in result[{i}])"
-                for i, elem_type in enumerate(element_types)
-            )
-    # Handle tuple types
-    elif hasattr(return_type, '__origin__') and return_type.__origin__ == tuple:
-        checks = [
-            f"isinstance(result[{i}], {t.__name__})"
-            for i, t in enumerate(return_type.__args__)
-        ]
-        return " and ".join(checks)
-
-
-    def recursive_list_check(element_type, level=0):
-        """recursive list generation."""
-        var_name = f"item{level}"
-        if hasattr(element_type, '__origin__') and element_type.__origin__ == list:
-            inner_type = element_type.__args__[0]
-            # Recursive checking for types in the list
-            inner_check = recursive_list_check(inner_type, level + 1)
-            return f"(isinstance({var_name}, list) and all({inner_check} for {var_name} in {var_name}))"
-        else:
-            # if Union
-            return f"(isinstance({var_name}, {element_type.__name__}) or " + handle_union_type_check(element_type) + ")"
-        # list
-    if return_type is None:
-        return_type_check = ""
-    elif hasattr(return_type, '__origin__') and return_type.__origin__ == list:
-        # Recursive check for nested lists
-        if len(return_type.__args__) == 1:
-            element_type = return_type.__args__[0]
-            # Check if the element type is a custom class (not a built-in type)
-            if isinstance(element_type, type):  # Check if element_type is a class
-                return_type_check = (
-                    f"assert isinstance(result, list) and all(isinstance(item, {element_type.__name__}) for item in result)"
-                )
-            else:
-                # Start the nested all() checks from the outermost list
-                return_type_check = (
-                    f"assert isinstance(result, list) and all({recursive_list_check(element_type)} for item0 in result)")
-
-    # # Handle MyList[int] and similar custom types
-    # if hasattr(return_type, '__supertype__'):  # Check for NewType
-    #     base_type = return_type.__supertype__
-    #     return_type_check = f"assert isinstance(result, {base_type.__name__})"
-
-    else:
-        return_type_check = f"assert isinstance(result, {return_type.__name__})"
-
-
-
-
-
-    if return_type == array.array:
-        return_type_check = f"assert isinstance(result, array.array)"
-
+    # The return annotation is checked by a compiled checker, defined along with the test
+    checker_code = ""
+    return_type_check = ""
+    if return_type is not None:
+        checker = validator(return_type)
+        checker_code = checker.code
+        return_type_check = f"assert {checker.name}(result)"
 
     # generated test fonction in methods
     if class_name:
@@ -149,7 +44,7 @@ def generate_test(func_name, func, class_name=None):
         if not params and return_type is not None:
             params = "just(None)"
             args = "_"
-            generated_code = f"""
+            generated_code = checker_code + f"""
 @given({params})
 def test_{class_name}_{func_name}({args}):
     {class_name.lower()} = {class_name}()
@@ -159,7 +54,7 @@ def test_{class_name}_{func_name}({args}):
             return generated_code
 
         else:
-            generated_code = f"""
+            generated_code = checker_code + f"""
 @given({params})
 def test_{class_name}_{func_name}({args}):
     instance = {class_name}()
@@ -174,7 +69,7 @@ def test_{class_name}_{func_name}({args}):
         if not params and return_type is not None:
             params = "just(None)"
             args = "_"
-            generated_code = f"""
+            generated_code = checker_code + f"""
 @given({params})
 def test_{func_name}({args}):
     result = {func_name}()
@@ -183,7 +78,7 @@ def test_{func_name}({args}):
             return generated_code
 
     # for standart fonction
-    generated_code = f"""
+    generated_code = checker_code + f"""
 @given({params})
 def test_{func_name}({args}):
     result = {func_name}({args})
@@ -192,63 +87,642 @@ def test_{func_name}({args}):
     return generated_code
 
 
-def main():
-    global test_code
-    sys.path.append('') #  path of the file to a succesful import # ('D:/BA/BA/benchmack')
-    module_name = 'finaltest'
-    file_path = 'finaltest.py'  #../web_gui/pom/pages/kk/kk001.py
-    spec = importlib.util.spec_from_file_location(module_name, file_path)
-    module = importlib.util.module_from_spec(spec)
-    spec.loader.exec_module(module)  # Execute and load the module code
+def generate_state_machine(class_name, init, methods):
+    """Builds a RuleBasedStateMachine test driving a single instance of a class through sequences of
+    calls to its public methods. init and each method are (name, parameter names, type hints), init
+    is None without an __init__. Parameters without an annotation draw from the Any strategy."""
+    checkers = {}
+
+    def rule_arguments(parameters, type_hints):
+        return ', '.join(f"{param}={type_to_strategy(type_hints.get(param, Any))}" for param in parameters)
+
+    if init is not None and init[1]:
+        _, parameters, type_hints = init
+        setup = f"""
+    @initialize({rule_arguments(parameters, type_hints)})
+    def init_instance(self, {', '.join(parameters)}):
+        self.instance = {class_name}({', '.join(parameters)})
+"""
+    else:
+        setup = f"""
+    def __init__(self):
+        super().__init__()
+        self.instance = {class_name}()
+"""
+
+    rules = []
+    for name, parameters, type_hints in methods:
+        call = f"self.instance.{name}({', '.join(parameters)})"
+        return_type = type_hints.get('return')
+        if return_type is None:
+            body = call
+        else:
+            checker = validator(return_type)
+            checkers[checker.name] = checker.code
+            body = f"result = {call}\n        assert {checker.name}(result)"
+        # Prefixed so that methods cannot override the machine's own, such as teardown
+        rules.append(f"""
+    @rule({rule_arguments(parameters, type_hints)})
+    def call_{name}(self{''.join(f', {param}' for param in parameters)}):
+        {body}
+""")
+
+    machine = f"{class_name}StateMachine"
+    return ''.join(checkers.values()) + f"""
+class {machine}(RuleBasedStateMachine):{setup}{''.join(rules)}
+
+def test_{class_name}_machine():
+    run_state_machine_as_test({machine})
+"""
+
+
+def generate_complexity_test(name, method_name=None, grow=None, expected=None):
+    """Builds the test measuring how a function, or a method of the class name grown through its grow
+    method, scales with the input size; it fails above the expected complexity class, when there is one."""
+    if method_name is None:
+        return f"""
+def test_{name}_complexity():
+    assert_complexity({name}, expected={expected!r})
+"""
+    return f"""
+def test_{name}_{method_name}_complexity():
+    assert_complexity({name}, {method_name!r}, grow={grow!r}, expected={expected!r})
+"""
+
+
+def method_parameters(node):
+    """Returns the names of the positional parameters a method is called with, or None for
+    decorated methods other than static and class methods, which are not called like that."""
+    decorators = [ast.unparse(decorator) for decorator in node.decorator_list]
+    if any(decorator not in ('staticmethod', 'classmethod') for decorator in decorators):
+        return None
+    parameters = [arg.arg for arg in [*node.args.posonlyargs, *node.args.args]]
+    return parameters if 'staticmethod' in decorators else parameters[1:]
 
-    # Parse the file
+
+def required_parameters(node, parameters):
+    """Drops the parameters of a function node that have a default, the last ones of its positional parameters."""
+    return parameters[:len(parameters) - len(node.args.defaults)]
+
+
+# Directories never searched for target modules
+SKIPPED_DIRS = {'__pycache__', 'venv', 'node_modules'}
+
+
+def discover_modules(root):
+    """Finds the modules of a directory tree as (file path, dotted module name) pairs, skipping test files."""
+    modules = []
+    for dir_path, dir_names, file_names in os.walk(root):
+        dir_names[:] = sorted(name for name in dir_names if name not in SKIPPED_DIRS and not name.startswith('.'))
+        for file_name in sorted(file_names):
+            if (not file_name.endswith('.py') or file_name.startswith('test_') or file_name.endswith('_test.py')
+                    or file_name in ('conftest.py', 'setup.py', '__init__.py')):
+                continue
+            file_path = os.path.join(dir_path, file_name)
+            module_path = os.path.splitext(os.path.relpath(file_path, root))[0]
+            modules.append((file_path, module_path.replace(os.sep, '.')))
+    return modules
+
+
+class GeneratedTest(NamedTuple):
+    name: str
+    signature: str
+    code: str
+    cached: bool
+
+
+def resolved_sources(type_hints):
+    """Returns the strategy sources of the parameters and the checker source of the return annotation
+    that the test of these type hints is generated from."""
+    return [validator(annotation).code if param == 'return' else type_to_strategy(annotation)
+            for param, annotation in type_hints.items()]
+
+
+def signature_hash(node, type_hints, init_node=None, sources=()):
+    """Hashes the AST of a function, of the __init__ its test instantiates, its resolved type hints,
+    the strategy and checker sources resolved from them and the size profile its strategies are capped by.
+    The sources follow the classes the hints refer to, such as the __init__ of a built parameter."""
+    digest = hashlib.sha256(ast.dump(node).encode())
+    if init_node is not None:
+        digest.update(ast.dump(init_node).encode())
+    digest.update(repr(type_hints).encode())
+    for source in sources:
+        digest.update(source.encode())
+    digest.update(repr(size_profile()).encode())
+    return digest.hexdigest()
+
+
+def parse_module(file_path):
     with open(file_path, "r") as source:
-        tree = ast.parse(source.read())
-
-    test_code = "from hypothesis import given, strategies as st, settings\n"
-    test_code += f"from {module_name} import *\n\n"
-    test_code += "from numpy import *\n\n"
-    test_code += "import array\n"
-    test_code += "from collections import deque\n"
-    test_code += "from types import NoneType\n"
-    test_code += "from binarytree import Node\n"
-    test_code += "import numpy as np\n\n"
-    test_code += "from hypothesis.extra import numpy as stnumpy\n\n"
-    test_code += "from hypothesis.extra.numpy import *\n\n"
-    test_code += "from hypothesis.strategies import just"
-
-    # Process classes and functions
+        return ast.parse(source.read())
+
+
+def iter_module_tests(file_path, module_name, tree, manifest_entries=None, static=False, stateful=False,
+                      complexity=None, module=None):
+    """Generates the tests of the functions and methods of a parsed module, one at a time.
+    Tests whose signature hash matches their manifest entry reuse the stored code instead.
+    In static mode the type hints are read from the AST, and the module is only imported
+    for annotations that cannot be resolved that way. In stateful mode each class gets a single
+    state machine test instead of one test per method. complexity, the {Class.method or function
+    name: expected complexity class} of the module, adds complexity tests when it is not None.
+    module is the already loaded module, if any."""
+    manifest_entries = manifest_entries or {}
+    if module is None and not static:
+        module = load_module(file_path, module_name)
+    static_module = StaticModule(tree, module_name) if static else None
+
+    def type_hints_of(node, class_name):
+        nonlocal module
+        if static_module is not None:
+            try:
+                return static_module.hints(node)
+            except UnresolvedAnnotation:
+                pass
+        if module is None:
+            module = load_module(file_path, module_name)
+        owner = getattr(module, class_name) if class_name else module
+        return get_type_hints(getattr(owner, node.name))
+
+
+    def cached_or_generated(test_name, signature, generate):
+        entry = manifest_entries.get(test_name)
+        if entry and entry['signature'] == signature:
+            return GeneratedTest(test_name, signature, entry['code'], True)
+        return GeneratedTest(test_name, signature, generate(), False)
+
+    # Process classes and functions, as (node, class name, class __init__ node)
+    targets = []
     for node in tree.body:
         if isinstance(node, ast.FunctionDef):
             # Top-level function
-            func_name = node.name
-            func_obj = getattr(module, func_name)
-            type_hints = get_type_hints(func_obj)
-            test_code += generate_test(func_name, type_hints)
+            targets.append((node, None, None))
+        elif isinstance(node, ast.ClassDef) and stateful:
+            methods = [class_node for class_node in node.body if isinstance(class_node, ast.FunctionDef)]
+            init_node = next((method for method in methods if method.name == '__init__'), None)
+            init = None if init_node is None else ('__init__', method_parameters(init_node),
+                                                   type_hints_of(init_node, node.name))
+            public = [(method.name, parameters, type_hints_of(method, node.name)) for method in methods
+                      if not method.name.startswith('_') and (parameters := method_parameters(method)) is not None]
+            if public:
+                type_hints = {name: hints for name, _, hints in public}
+                sources = [source for _, _, hints in ([init] if init else []) + public
+                           for source in resolved_sources(hints)]
+                signature = signature_hash(node, {'__init__': init and init[2], **type_hints}, sources=sources)
+                yield cached_or_generated(f"test_{node.name}_machine", signature,
+                                          lambda: generate_state_machine(node.name, init, public))
+        elif isinstance(node, ast.ClassDef):
+            # Class with methods, properties and other decorated methods are not called like them
+            methods = [class_node for class_node in node.body if isinstance(class_node, ast.FunctionDef)]
+            init_node = next((method for method in methods if method.name == '__init__'), None)
+            for method in methods:
+                if method_parameters(method) is not None:
+                    targets.append((method, node.name, init_node))
+
+    for node, class_name, init_node in targets:
+        type_hints = type_hints_of(node, class_name)
+        test_name = f"test_{class_name}_{node.name}" if class_name else f"test_{node.name}"
+        signature = signature_hash(node, type_hints, init_node, resolved_sources(type_hints))
+        yield cached_or_generated(test_name, signature, lambda: generate_test(node.name, type_hints, class_name))
+
+    if complexity is None:
+        return
+
+    def buildable(node, parameters, class_name):
+        # Arguments are built from the annotations, targets with parameters they do not describe are skipped
+        type_hints = type_hints_of(node, class_name)
+        return all(is_buildable(type_hints.get(param)) for param in required_parameters(node, parameters))
+
+    for node in tree.body:
+        if isinstance(node, ast.FunctionDef):
+            # Functions taking a collection or a string, or else sized by their numbers
+            type_hints = type_hints_of(node, None)
+            parameters = required_parameters(node, [arg.arg for arg in [*node.args.posonlyargs, *node.args.args]])
+            if (buildable(node, parameters, None)
+                    and any(is_sized(type_hints[param]) or type_hints[param] in (int, float) for param in parameters)):
+                expected = complexity.get(node.name)
+                yield cached_or_generated(f"test_{node.name}_complexity", signature_hash(node, {'expected': expected}),
+                                          lambda: generate_complexity_test(node.name, expected=expected))
         elif isinstance(node, ast.ClassDef):
-            # Class with methods
-            class_name = node.name
-            class_obj = getattr(module, class_name)
-            for class_node in node.body:
-                if isinstance(class_node, ast.FunctionDef):
-                    method_name = class_node.name
-                    method_obj = getattr(class_obj, method_name)
-                    type_hints = get_type_hints(method_obj)
-                    test_code += generate_test(method_name, type_hints, class_name)
-
-    # Write the generated test code to a file
-    test_file_path = 'test_' + module_name + '.py'
-    with open(test_file_path, 'w') as test_file:
-        test_file.write(test_code)
-
-    # Run the generated tests and print results
-    print(f"Running tests in {test_file_path}...")
-    result = pytest.main([test_file_path])
-    if result == 0:
+            # Methods of classes that can be grown one element at a time, from elements of its annotation
+            # or else ints
+            methods = {method.name: method for method in node.body if isinstance(method, ast.FunctionDef)
+                       and not method.name.startswith('_') and method_parameters(method) is not None}
+            grow = next((name for name in GROW_METHODS
+                         if name in methods and len(method_parameters(methods[name])) == 1), None)
+            if grow is None:
+                continue
+            grow_hint = type_hints_of(methods[grow], node.name).get(method_parameters(methods[grow])[0])
+            init_node = next((method for method in node.body
+                              if isinstance(method, ast.FunctionDef) and method.name == '__init__'), None)
+            if ((grow_hint is not None and not is_buildable(grow_hint))
+                    or (init_node is not None and not buildable(init_node, method_parameters(init_node), node.name))):
+                continue
+            for method in methods.values():
+                if not buildable(method, method_parameters(method), node.name):
+                    continue
+                expected = complexity.get(f"{node.name}.{method.name}")
+                yield cached_or_generated(f"test_{node.name}_{method.name}_complexity",
+                                          signature_hash(method, {'expected': expected}, node),
+                                          lambda: generate_complexity_test(node.name, method.name, grow, expected))
+
+
+def generate_module_tests(file_path, module_name, manifest_entries=None, static=False, stateful=False,
+                          complexity=None):
+    """Loads and parses one module and generates all the tests of its functions and methods.
+    Returns the names defined by the module and the GeneratedTest list."""
+    tree = parse_module(file_path)
+    module = None if static else load_module(file_path, module_name)
+    tests = iter_module_tests(file_path, module_name, tree, manifest_entries, static, stateful, complexity, module)
+    return module_level_names(tree, module), list(tests)
+
+
+# Import of each helper name the generated tests may use
+HELPER_IMPORTS = {
+    'given': "from hypothesis import given",
+    'settings': "from hypothesis import settings",
+    'st': "from hypothesis import strategies as st",
+    'just': "from hypothesis.strategies import just",
+    'stnumpy': "from hypothesis.extra import numpy as stnumpy",
+    'np': "import numpy as np",
+    'array': "import array",
+    'deque': "from collections import deque",
+    'NoneType': "from types import NoneType",
+    'Node': "from binarytree import Node",
+    'RuleBasedStateMachine': "from hypothesis.stateful import RuleBasedStateMachine",
+    'rule': "from hypothesis.stateful import rule",
+    'initialize': "from hypothesis.stateful import initialize",
+    'run_state_machine_as_test': "from hypothesis.stateful import run_state_machine_as_test",
+    'assert_complexity': "from complexity import assert_complexity",
+}
+
+
+def module_level_names(tree, module=None):
+    """Returns the names a module defines or imports at top level, all the globals of the module once loaded.
+    From the source alone, the names of star imports are unknown, see build_header()."""
+    if module is not None:
+        return set(vars(module))
+    names = set()
+    statements = list(tree.body)
+    while statements:
+        node = statements.pop()
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            names.add(node.name)
+        elif isinstance(node, (ast.Assign, ast.AnnAssign)):
+            targets = node.targets if isinstance(node, ast.Assign) else [node.target]
+            names.update(target.id for target in targets if isinstance(target, ast.Name))
+        elif isinstance(node, (ast.Import, ast.ImportFrom)):
+            names.update((alias.asname or alias.name).split('.')[0] for alias in node.names if alias.name != '*')
+        elif isinstance(node, (ast.If, ast.Try, ast.With)):
+            # Names bound conditionally, such as an import with a fallback
+            statements.extend(node.body)
+            statements.extend(getattr(node, 'orelse', []))
+            statements.extend(getattr(node, 'finalbody', []))
+            for handler in getattr(node, 'handlers', []):
+                statements.extend(handler.body)
+    return names
+
+
+def used_names(test_code):
+    """Returns the global names loaded by generated test code and not defined by it."""
+    top = symtable.symtable(test_code, '<generated>', 'exec')
+    defined = {symbol.get_name() for symbol in top.get_symbols() if symbol.is_assigned() or symbol.is_imported()}
+    used, tables = set(), [top]
+    while tables:
+        table = tables.pop()
+        tables.extend(table.get_children())
+        used.update(symbol.get_name() for symbol in table.get_symbols()
+                    if symbol.is_referenced() and (table is top or symbol.is_global()))
+    return used - defined
+
+
+def build_header(module_name, test_code, module_names, imported=None):
+    """Builds the imports of generated test code from the names its tests actually use, leaving out
+    the names of imported, which is updated in place.
+    Names of the target module win over the helpers, so its own Node is not shadowed by binarytree's.
+    Names found nowhere else, such as those of a star import of the target, are star imported from it."""
+    used = used_names(test_code)
+    if imported is not None:
+        used -= imported
+        imported.update(used)
+
+    target_names = sorted(used & module_names)
+    header_lines = [line for name, line in HELPER_IMPORTS.items() if name in used and name not in module_names]
+    if target_names:
+        header_lines.append(f"from {module_name} import {', '.join(target_names)}")
+    if used - module_names - HELPER_IMPORTS.keys() - set(dir(builtins)):
+        header_lines.append(f"from {module_name} import *")
+    return '\n'.join(header_lines) + '\n\n' if header_lines else ''
+
+
+def without_defined_checkers(test_code, defined):
+    """Drops from the code of a test the return checkers already in defined, the names of the checkers
+    written earlier in the same file, and adds its own."""
+    lines = test_code.split('\n')
+    for node in reversed(ast.parse(test_code).body):
+        if isinstance(node, ast.FunctionDef) and not node.name.startswith('test_'):
+            if node.name in defined:
+                del lines[node.lineno - 1:node.end_lineno]
+            else:
+                defined.add(node.name)
+    return '\n'.join(lines)
+
+
+def emit_tests(test_file, module_name, module_names, tests):
+    """Pipeline stage writing each test as soon as it is produced, preceded by the imports it is the
+    first to need, then passing it on. pytest can collect the first tests while the rest are generated."""
+    imported, defined = set(), set()
+    for test in tests:
+        code = without_defined_checkers(test.code, defined)
+        test_file.write(build_header(module_name, code, module_names, imported))
+        test_file.write(code)
+        test_file.flush()
+        yield test
+
+
+class GeneratedModule(NamedTuple):
+    file_path: str
+    module_name: str
+    module_names: set
+    tests: list
+    error: str
+
+    @property
+    def test_code(self):
+        defined = set()
+        return ''.join(without_defined_checkers(test.code, defined) for test in self.tests)
+
+    @property
+    def header(self):
+        return build_header(self.module_name, self.test_code, self.module_names)
+
+
+def _generate_module(target):
+    """Generates the tests of one (file path, module name, manifest entries, static, stateful, expected complexity
+    classes, profile name) target, reporting failures instead of raising."""
+    file_path, module_name, manifest_entries, static, stateful, complexity, profile = target
+    use_profile(profile)  # Pool workers do not inherit the profile of the parent process
+    try:
+        module_names, tests = generate_module_tests(file_path, module_name, manifest_entries, static, stateful,
+                                                    complexity)
+    except Exception as error:
+        return GeneratedModule(file_path, module_name, set(), [], f"{type(error).__name__}: {error}")
+    return GeneratedModule(file_path, module_name, module_names, tests, None)
+
+
+def generate_all(targets, workers, manifest, static=False, stateful=False, complexity=None, profile='standard'):
+    """Generates the tests of every (file path, module name) target, concurrently when there are several workers.
+    complexity maps module names to their expected complexity classes, when complexity tests are enabled."""
+    targets = [(file_path, module_name, manifest.get(module_name), static, stateful,
+                None if complexity is None else complexity[module_name], profile)
+               for file_path, module_name in targets]
+    if workers > 1 and len(targets) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(_generate_module, targets))
+    generated = [_generate_module(target) for target in targets]
+    cache_info = strategy_cache.info()
+    print(f"Resolved strategies: {cache_info.misses} distinct types, {cache_info.hits} cache hits")
+    return generated
+
+
+def load_manifest(manifest_path):
+    """Reads the {module: {test name: {signature, code, passed}}} manifest of the previous run."""
+    try:
+        with open(manifest_path) as manifest_file:
+            return json.load(manifest_file)
+    except FileNotFoundError:
+        return {}
+
+
+def save_manifest(manifest_path, manifest):
+    with open(manifest_path, 'w') as manifest_file:
+        json.dump(manifest, manifest_file, indent=2, sort_keys=True)
+
+
+def update_manifest(manifest, result, outcomes):
+    """Records the tests of a generated module with the outcome of those that ran (name -> passed)."""
+    previous = manifest.get(result.module_name, {})
+    manifest[result.module_name] = {
+        test.name: {
+            'signature': test.signature,
+            'code': test.code,
+            'passed': outcomes.get(test.name, previous.get(test.name, {}).get('passed')),
+        }
+        for test in result.tests
+    }
+
+
+def tests_to_run(result, manifest):
+    """Names of the tests of a module that must run: new, changed, or not passing on the previous run."""
+    entries = manifest.get(result.module_name, {})
+    return {test.name for test in result.tests if not test.cached or not entries[test.name]['passed']}
+
+
+def stream_all(targets, manifest, static, stateful, complexity, output_dir, keep_code):
+    """Generates and writes the tests of every (file path, module name) target in this process,
+    one test at a time. The code of the written tests is only kept in memory when keep_code is set."""
+    os.makedirs(output_dir, exist_ok=True)
+    generated = []
+    for file_path, module_name in targets:
+        test_file_path = os.path.join(output_dir, test_file_name(module_name))
+        try:
+            tree = parse_module(file_path)
+            module = None if static else load_module(file_path, module_name)
+            module_names = module_level_names(tree, module)
+            tests = iter_module_tests(file_path, module_name, tree, manifest.get(module_name), static, stateful,
+                                      None if complexity is None else complexity[module_name], module)
+            with open(test_file_path, 'w') as test_file:
+                written = [test if keep_code else test._replace(code='')
+                           for test in emit_tests(test_file, module_name, module_names, tests)]
+        except Exception as error:
+            if os.path.exists(test_file_path):
+                os.remove(test_file_path)
+            generated.append(GeneratedModule(file_path, module_name, set(), [], f"{type(error).__name__}: {error}"))
+            continue
+        generated.append(GeneratedModule(file_path, module_name, module_names, written, None))
+    cache_info = strategy_cache.info()
+    print(f"Resolved strategies: {cache_info.misses} distinct types, {cache_info.hits} cache hits")
+    return generated
+
+
+def test_file_name(module_name):
+    return 'test_' + module_name.replace('.', '_') + '.py'
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Generates Hypothesis tests from the type hints of a module and runs them.")
+    parser.add_argument('path', nargs='?', default='finaltest.py',
+                        help="module to test, or a directory whose modules are all tested")  #../web_gui/pom/pages/kk/kk001.py
+    parser.add_argument('--output-dir', default='.', help="directory the test_<module>.py files are written to")
+    parser.add_argument('--in-process', action='store_true',
+                        help="run the generated tests in this process instead of writing them for pytest")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="generate modules and run the generated tests across a pool of N worker processes")
+    parser.add_argument('--seed', type=int, default=None, help="fixed Hypothesis seed, for reproducible runs")
+    parser.add_argument('--manifest', default=None,
+                        help="signature manifest; only regenerate and run the tests that changed since it was written")
+    parser.add_argument('--static', action='store_true',
+                        help="resolve annotations from the source instead of importing the module, when possible")
+    parser.add_argument('--stateful', action='store_true',
+                        help="test each class with a state machine calling its public methods in sequence "
+                             "on one instance, instead of one test per method")
+    parser.add_argument('--complexity', action='store_true',
+                        help="add tests timing each function and growable class method over growing input sizes, "
+                             "failing above its declared complexity class or the one measured by the first run")
+    parser.add_argument('--complexity-spec', default=None,
+                        help='JSON file of declared complexity classes, such as {"Queue.dequeue": "O(1)"}')
+    parser.add_argument('--calibrate', action='store_true',
+                        help="time a few examples of each target and give each test max_examples and deadline settings")
+    parser.add_argument('--budget', type=float, default=60.0,
+                        help="wall-clock seconds the calibrated tests should fit in (default: 60)")
+    parser.add_argument('--database', default=os.path.join('.hypothesis', 'generated'),
+                        help="directory of the example database shared by workers and runs, "
+                             "previously failing examples are replayed first")
+    parser.add_argument('--profile', choices=sorted(PROFILES), default='standard',
+                        help="size caps of the generated collections and default examples per test: "
+                             "smoke for quick checks, deep for exhaustive runs (default: standard)")
+    parser.add_argument('--report', default=None,
+                        help="write a JSON report of the wall time, examples and throughput of every test")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    sys.path.append('') #  path of the file to a succesful import # ('D:/BA/BA/benchmack')
+    if os.path.isdir(args.path):
+        # Package-wide run, module names are relative to the given directory
+        sys.path.insert(0, os.path.abspath(args.path))
+        targets = discover_modules(args.path)
+    else:
+        targets = [(args.path, os.path.splitext(os.path.basename(args.path))[0])]
+    manifest = load_manifest(args.manifest) if args.manifest else {}
+    use_profile(args.profile)
+    use_example_database(args.database, size_profile().max_examples)
+    failures = load_failures(args.database)
+    complexity = None
+    if args.complexity:
+        baseline_path = os.path.join(args.database, 'complexity.json')
+        declared = load_classes(args.complexity_spec) if args.complexity_spec else {}
+        baseline = load_classes(baseline_path)
+        complexity = {module_name: expected_classes(declared, baseline, module_name) for _, module_name in targets}
+
+    # Without in-process runs, workers or calibration, each test is written as soon as it is generated
+    streaming = not (args.in_process or args.workers > 1 or args.calibrate)
+    if streaming:
+        results = stream_all(targets, manifest, args.static, args.stateful, complexity, args.output_dir,
+                             keep_code=bool(args.manifest))
+    else:
+        results = generate_all(targets, args.workers, manifest, args.static, args.stateful, complexity, args.profile)
+
+    generated = []
+    skipped = 0
+    for result in results:
+        if result.error:
+            print(f"Skipping {result.module_name}: {result.error}")
+            skipped += 1
+        else:
+            generated.append(result)
+
+    # Without a manifest every test runs
+    selected = {result.module_name: tests_to_run(result, manifest) if args.manifest else None
+                for result in generated}
+    if args.calibrate:
+        print(f"Calibrating tests for a {args.budget:g}s budget...")
+        generated = calibrate(generated, args.budget, selected)
+    outcomes = {}
+    timed = args.report is not None
+    report_entries = []
+    # Modules that could not be generated count as failures
+    passed = not skipped
+    if args.in_process or args.workers > 1:
+        for result in generated:
+            names = selected[result.module_name]
+            failing = set(failures.get(result.module_name, ()))
+            if args.workers > 1:
+                print(f"Running tests for {result.module_name} on {args.workers} workers...")
+                results = run_in_pool(result.test_code, result.file_path, result.module_name, args.workers,
+                                      args.seed, names, failing, args.database, timed,
+                                      size_profile().max_examples)
+            else:
+                # Skip the write, pytest startup and collection round-trip
+                print(f"Running tests for {result.module_name} in-process...")
+                module = load_module(result.file_path, result.module_name)
+                results = run_in_process(result.test_code, module, args.seed, names, failing, timed)
+            outcomes[result.module_name] = {test.name: test.error is None for test in results}
+            report_entries.extend(test_entry(result.module_name, test.name, test.error is None, test.seconds,
+                                             test.timings) for test in results)
+            passed &= report(results, cached=len(result.tests) - len(results))
+    else:
+        # Write the generated test code, one file per module
+        os.makedirs(args.output_dir, exist_ok=True)
+        failing_ids, test_ids = [], []
+        for result in generated:
+            test_file_path = os.path.join(args.output_dir, test_file_name(result.module_name))
+            if not streaming:
+                with open(test_file_path, 'w') as test_file:
+                    test_file.write(result.header + result.test_code)
+            names = selected[result.module_name]
+            failing = set(failures.get(result.module_name, ()))
+            if names is None and not failing:
+                test_ids.append(test_file_path)
+                continue
+            # Previously failing tests are passed to pytest first, so they run first
+            for test in result.tests:
+                if names is None or test.name in names:
+                    test_id = f"{test_file_path}::{test.name}"
+                    (failing_ids if test.name in failing else test_ids).append(test_id)
+        test_ids = failing_ids + test_ids
+
+        # Run the generated tests and print results
+        collector = PytestResults()
+        timings = TimingCollector() if timed else contextlib.nullcontext()
+        if test_ids:
+            print(f"Running tests in {', '.join(sorted({test_id.split('::')[0] for test_id in test_ids}))}...")
+            pytest_args = list(test_ids)
+            if args.seed is not None:
+                pytest_args.append(f"--hypothesis-seed={args.seed}")
+            with timings:
+                passed = pytest.main(pytest_args, plugins=[collector]) == 0 and not skipped
+        else:
+            passed = bool(generated) and not skipped
+        cached = sum(len(result.tests) for result in generated) - len(collector.results)
+        if args.manifest:
+            print(f"{cached} tests cached.")
+        for result in generated:
+            file_name = test_file_name(result.module_name)
+            outcomes[result.module_name] = {name: error is None for (test_file, name), error in collector.results.items()
+                                            if test_file == file_name}
+            if timed:
+                report_entries.extend(
+                    test_entry(result.module_name, name, test_passed, collector.durations[file_name, name],
+                               timings.tests.get((file_name, name)))
+                    for name, test_passed in outcomes[result.module_name].items())
+
+    if args.manifest:
+        for result in generated:
+            update_manifest(manifest, result, outcomes[result.module_name])
+        save_manifest(args.manifest, manifest)
+
+    if timed:
+        write_report(args.report, report_entries)
+        print(f"Timing report written to {args.report}")
+
+    # Tests that did not run keep their previous state
+    for result in generated:
+        module_outcomes = outcomes[result.module_name]
+        previous = set(failures.get(result.module_name, ()))
+        failures[result.module_name] = [test.name for test in result.tests
+                                        if not module_outcomes.get(test.name, test.name not in previous)]
+    save_failures(args.database, failures)
+    if args.complexity:
+        # Pool workers measure in their own process, only in-process and pytest runs extend the baseline
+        update_baseline(baseline_path, os.path.join(args.database, 'complexity_runs.json'))
+
+    if passed:
         print("All tests passed.")
     else:
         print("Some tests failed.")
+    return 0 if passed else 1
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -0,0 +1,191 @@
+"""Runs generated Hypothesis tests inside the generator process, without a pytest round-trip."""
+import ast
+import contextlib
+import importlib.util
+import io
+import json
+import linecache
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import NamedTuple
+
+import hypothesis.core
+from hypothesis import given, settings, seed
+from hypothesis.database import DirectoryBasedExampleDatabase
+from hypothesis.stateful import RuleBasedStateMachine, rule, initialize, run_state_machine_as_test
+from hypothesis.strategies import just
+
+from complexity import assert_complexity
+from strategies import strategy_namespace
+from timing import TimingCollector
+
+
+class TestResult(NamedTuple):
+    __test__ = False  # Not a pytest test class
+
+    name: str
+    error: str  # None when the test passed
+    seconds: float
+    timings: object  # TestTimings of the run, when timed
+
+
+# Tests of the current pool worker, see _init_worker()
+_worker_tests = {}
+
+
+def load_module(file_path, module_name):
+    """Imports the target module from its file."""
+    spec = importlib.util.spec_from_file_location(module_name, file_path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)  # Execute and load the module code
+    return module
+
+
+def test_namespace(module):
+    """Returns the globals of the generated tests: the strategy helpers, then the target module."""
+    namespace = strategy_namespace()
+    namespace.update(given=given, settings=settings, just=just, NoneType=type(None),
+                     RuleBasedStateMachine=RuleBasedStateMachine, rule=rule, initialize=initialize,
+                     run_state_machine_as_test=run_state_machine_as_test, assert_complexity=assert_complexity)
+    namespace.update(vars(module))
+    return namespace
+
+
+def test_names(code_tree):
+    """Returns the names of the tests defined by the generated code, in definition order."""
+    return [node.name for node in code_tree.body
+            if isinstance(node, ast.FunctionDef) and node.name.startswith('test_')]
+
+
+def collect_tests(test_code, module, hypothesis_seed=None):
+    """Executes the generated test definitions and returns them as (name, callable) pairs."""
+    code_tree = ast.parse(test_code)
+    namespace = test_namespace(module)
+    # Hypothesis keys its example database on the test source, make it readable as for a test file
+    file_name = f"<generated tests for {module.__name__}>"
+    linecache.cache[file_name] = (len(test_code), None, test_code.splitlines(True), file_name)
+    exec(compile(code_tree, file_name, 'exec'), namespace)
+    tests = [(name, namespace[name]) for name in test_names(code_tree)]
+    if hypothesis_seed is not None:
+        # Same seed for every test, whichever process runs it. State machine tests draw from the inner
+        # @given of run_state_machine_as_test(), which only the global seed of pytest --hypothesis-seed reaches
+        hypothesis.core.global_force_seed = hypothesis_seed
+        tests = [(name, seed(hypothesis_seed)(test)) for name, test in tests]
+    return tests
+
+
+def run_test(name, test, timed=False):
+    """Runs one test and returns its TestResult, with per-example timings when timed."""
+    error = None
+    collector = TimingCollector() if timed else contextlib.nullcontext()
+    start = time.perf_counter()
+    try:
+        # Capture the output of the targets, as pytest does
+        with collector, contextlib.redirect_stdout(io.StringIO()):
+            test()
+    except Exception as exception:
+        message = str(exception).splitlines()[0] if str(exception) else ''
+        error = f"{type(exception).__name__}: {message}"
+    seconds = time.perf_counter() - start
+    return TestResult(name, error, seconds, collector.tests.get(('', name)) if timed else None)
+
+
+def report(results, cached=0):
+    """Prints a pytest-like summary of TestResults and returns True if every test passed."""
+    failures = [result for result in results if result.error is not None]
+    for name, error, *_ in failures:
+        print(f"FAILED {name} - {error}")
+    summary = f"{len(failures)} failed, {len(results) - len(failures)} passed"
+    if cached:
+        summary += f", {cached} cached"
+    print(summary)
+    return not failures
+
+
+def failures_first(names, failing):
+    """Orders test names so that the tests which failed on the previous run come first."""
+    return sorted(names, key=lambda name: name not in failing)
+
+
+def run_in_process(test_code, module, hypothesis_seed=None, names=None, failing=(), timed=False):
+    """Runs the generated tests, or only the given names, against the already loaded module,
+    previously failing tests first. Returns the TestResults."""
+    tests = dict(collect_tests(test_code, module, hypothesis_seed))
+    selected = [name for name in tests if names is None or name in names]
+    return [run_test(name, tests[name], timed) for name in failures_first(selected, failing)]
+
+
+def use_example_database(directory, max_examples=None):
+    """Makes the tests of this process share the on-disk example database of directory,
+    so failing examples found by any worker or run are replayed first by the next ones.
+    max_examples, when given, is the default of the tests without a calibrated @settings."""
+    profile = {'database': DirectoryBasedExampleDatabase(os.path.join(directory, 'examples'))}
+    if max_examples is not None:
+        profile['max_examples'] = max_examples
+    settings.register_profile('generated', **profile)
+    settings.load_profile('generated')
+
+
+def load_failures(directory):
+    """Reads the {module name: [test names]} that failed on the previous run."""
+    try:
+        with open(os.path.join(directory, 'failing.json')) as failures_file:
+            return json.load(failures_file)
+    except FileNotFoundError:
+        return {}
+
+
+def save_failures(directory, failures):
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, 'failing.json'), 'w') as failures_file:
+        json.dump(failures, failures_file, indent=2, sort_keys=True)
+
+
+def _init_worker(file_path, module_name, test_code, hypothesis_seed, database, max_examples):
+    """Loads the target module and the generated tests once per pool worker."""
+    if database is not None:
+        use_example_database(database, max_examples)
+    elif max_examples is not None:
+        settings.register_profile('generated', max_examples=max_examples)
+        settings.load_profile('generated')
+    module = load_module(file_path, module_name)
+    _worker_tests.update(collect_tests(test_code, module, hypothesis_seed))
+
+
+def _run_worker_test(name, timed):
+    return run_test(name, _worker_tests[name], timed)
+
+
+def run_in_pool(test_code, file_path, module_name, workers, hypothesis_seed=None, names=None, failing=(),
+                database=None, timed=False, max_examples=None):
+    """Spreads the generated tests, or only the given names, over a process pool, previously failing
+    tests first. Returns the merged TestResults."""
+    selected = [name for name in test_names(ast.parse(test_code)) if names is None or name in names]
+    if not selected:
+        return []
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(file_path, module_name, test_code, hypothesis_seed, database,
+                                       max_examples)) as pool:
+        # One test per task so that slow tests do not hold up a whole chunk
+        ordered = failures_first(selected, failing)
+        return list(pool.map(_run_worker_test, ordered, [timed] * len(ordered)))
+
+
+class PytestResults:
+    """pytest plugin recording the error (None when passed) and the duration of every test it runs."""
+
+    def __init__(self):
+        self.results = {}
+        self.durations = {}
+
+    def pytest_runtest_logreport(self, report):
+        # Keyed on (test file name, test name)
+        file_path, _, name = report.nodeid.partition('::')
+        key = (os.path.basename(file_path), name)
+        self.durations[key] = self.durations.get(key, 0.0) + report.duration
+        if report.failed:
+            message = str(report.longrepr).strip().splitlines()
+            self.results[key] = message[-1] if message else 'failed'
+        elif report.when == 'call':
+            self.results.setdefault(key, None)
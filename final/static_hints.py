@@ -0,0 +1,202 @@
+"""Resolves the type hints of a module from its AST, without executing the module."""
+import ast
+import builtins
+import importlib
+import inspect
+import sys
+import typing
+
+
+class UnresolvedAnnotation(Exception):
+    """Raised when an annotation refers to a name that only the executed module can provide."""
+
+
+# Module-level assignments that are read as type aliases (Vector = list[float], UserId = NewType(...))
+_ALIAS_NODES = (ast.Subscript, ast.Name, ast.Attribute, ast.BinOp, ast.Constant)
+_ALIAS_CALLS = ('NewType', 'TypeVar')
+
+
+class _Names:
+    """Mapping handed to eval() so that names are resolved lazily, on first use."""
+
+    def __init__(self, static_module):
+        self.static_module = static_module
+
+    def __getitem__(self, name):
+        return self.static_module.lookup(name)
+
+
+class StaticModule:
+    """Type hints of the functions and methods of a parsed module, resolved without importing it.
+
+    Classes defined in the module are replaced by stub classes carrying the same name and
+    __init__ annotations, which is all the strategies need. Names imported from the standard
+    library are imported; any other name raises UnresolvedAnnotation.
+    """
+
+    def __init__(self, tree, module_name):
+        self.module_name = module_name
+        self.resolved = {}
+        self.imports = {}
+        self.classes = {}
+        self.aliases = {}
+        for node in tree.body:
+            if isinstance(node, ast.Import):
+                for alias in node.names:
+                    if alias.asname:
+                        self.imports[alias.asname] = (alias.name, None)
+                    else:
+                        top_level = alias.name.split('.')[0]
+                        self.imports[top_level] = (top_level, None)
+            elif isinstance(node, ast.ImportFrom) and node.level == 0:
+                for alias in node.names:
+                    if alias.name != '*':
+                        self.imports[alias.asname or alias.name] = (node.module, alias.name)
+            elif isinstance(node, ast.ClassDef):
+                self.classes[node.name] = node
+            elif isinstance(node, ast.Assign) and len(node.targets) == 1 and isinstance(node.targets[0], ast.Name):
+                if _is_alias(node.value):
+                    self.aliases[node.targets[0].id] = node.value
+
+    def hints(self, node):
+        """Returns the type hints of a function node, like typing.get_type_hints()."""
+        arguments = node.args
+        annotations = {}
+        for arg in [*arguments.posonlyargs, *arguments.args, arguments.vararg, *arguments.kwonlyargs, arguments.kwarg]:
+            if arg is not None and arg.annotation is not None:
+                annotations[arg.arg] = self.evaluate(arg.annotation)
+        if node.returns is not None:
+            annotations['return'] = self.evaluate(node.returns)
+
+        # Let typing evaluate the nested forward references and normalize None, every name they use is resolved
+        def holder():
+            pass
+
+        holder.__annotations__ = annotations
+        try:
+            return typing.get_type_hints(holder, globalns=dict(self.resolved))
+        except Exception as error:
+            raise UnresolvedAnnotation(node.name) from error
+
+    def evaluate(self, annotation):
+        """Evaluates an annotation node, following string forward references."""
+        if isinstance(annotation, ast.Constant) and isinstance(annotation.value, str):
+            annotation = ast.parse(annotation.value, mode='eval').body
+        self._resolve_forward_names(annotation)
+        code = compile(ast.Expression(annotation), f"<annotations of {self.module_name}>", 'eval')
+        try:
+            value = eval(code, {'__builtins__': {}}, _Names(self))
+        except UnresolvedAnnotation:
+            raise
+        except Exception as error:
+            raise UnresolvedAnnotation(ast.unparse(annotation)) from error
+        if isinstance(value, str):
+            return self.evaluate(ast.parse(value, mode='eval').body)
+        return value
+
+    def lookup(self, name):
+        """Resolves a name used in an annotation, module-level definitions first."""
+        if name not in self.resolved:
+            if name in self.classes:
+                self._stub_class(self.classes[name])
+            elif name in self.aliases:
+                self.resolved[name] = self.evaluate(self.aliases[name])
+            elif name in self.imports:
+                self.resolved[name] = self._import(*self.imports[name])
+            elif hasattr(typing, name) and name in typing.__all__:
+                self.resolved[name] = getattr(typing, name)
+            elif hasattr(builtins, name):
+                self.resolved[name] = getattr(builtins, name)
+            else:
+                raise UnresolvedAnnotation(name)
+        return self.resolved[name]
+
+    def _resolve_forward_names(self, annotation):
+        """Resolves the names used by the string forward references nested in an annotation."""
+        if isinstance(annotation, ast.Subscript) and ast.unparse(annotation.value).endswith('Literal'):
+            return  # Literal strings are values
+        if isinstance(annotation, ast.Constant) and isinstance(annotation.value, str):
+            try:
+                forward_ref = ast.parse(annotation.value, mode='eval').body
+            except SyntaxError as error:
+                raise UnresolvedAnnotation(annotation.value) from error
+            for node in ast.walk(forward_ref):
+                if isinstance(node, ast.Name):
+                    self.lookup(node.id)
+            self._resolve_forward_names(forward_ref)
+            return
+        for child in ast.iter_child_nodes(annotation):
+            self._resolve_forward_names(child)
+
+    def _import(self, module_name, attribute):
+        # Only modules without side effects for the target: the standard library and what is already loaded
+        if module_name.split('.')[0] not in sys.stdlib_module_names and module_name not in sys.modules:
+            raise UnresolvedAnnotation(f"{module_name}.{attribute}" if attribute else module_name)
+        module = importlib.import_module(module_name)
+        if attribute is None:
+            return module
+        try:
+            return getattr(module, attribute)
+        except AttributeError:
+            raise UnresolvedAnnotation(f"{module_name}.{attribute}")
+
+    def _stub_class(self, node):
+        """Builds a stand-in for a class of the module, with the annotations of its __init__."""
+        base_names = [ast.unparse(base) for base in node.bases]
+        if base_names in (['NamedTuple'], ['typing.NamedTuple']):
+            fields = [(field.target.id, self.evaluate(field.annotation)) for field in node.body
+                      if isinstance(field, ast.AnnAssign) and isinstance(field.target, ast.Name)]
+            stub = typing.NamedTuple(node.name, fields)
+            stub.__module__ = self.module_name
+            self.resolved[node.name] = stub
+            return
+
+        bases = tuple(self.evaluate(base) for base in node.bases)
+        init_node = next((item for item in node.body
+                          if isinstance(item, ast.FunctionDef) and item.name == '__init__'), None)
+        if init_node is None and any(base.__module__ != self.module_name for base in bases):
+            # Inherits an __init__ we cannot read without the base class
+            raise UnresolvedAnnotation(node.name)
+        try:
+            stub = type(node.name, bases, {'__module__': self.module_name, '__qualname__': node.name})
+        except TypeError as error:
+            raise UnresolvedAnnotation(node.name) from error
+        # Registered before the __init__ annotations are resolved, for self-referencing classes
+        self.resolved[node.name] = stub
+        if init_node is None:
+            return
+
+        def __init__(self, *args, **kwargs):
+            pass
+
+        try:
+            __init__.__annotations__ = self.hints(init_node)
+        except UnresolvedAnnotation:
+            del self.resolved[node.name]
+            raise
+        # Which parameters have a default, the values themselves are not evaluated
+        __init__.__signature__ = _signature(init_node.args)
+        stub.__init__ = __init__
+
+
+def _signature(arguments):
+    """Builds the inspect.Signature of a function node, with Ellipsis standing for every default."""
+    Parameter = inspect.Parameter
+    positional = [*arguments.posonlyargs, *arguments.args]
+    first_default = len(positional) - len(arguments.defaults)
+    parameters = [Parameter(arg.arg, Parameter.POSITIONAL_ONLY if arg in arguments.posonlyargs
+                            else Parameter.POSITIONAL_OR_KEYWORD, default=... if i >= first_default else Parameter.empty)
+                  for i, arg in enumerate(positional)]
+    if arguments.vararg:
+        parameters.append(Parameter(arguments.vararg.arg, Parameter.VAR_POSITIONAL))
+    parameters.extend(Parameter(arg.arg, Parameter.KEYWORD_ONLY, default=Parameter.empty if default is None else ...)
+                      for arg, default in zip(arguments.kwonlyargs, arguments.kw_defaults))
+    if arguments.kwarg:
+        parameters.append(Parameter(arguments.kwarg.arg, Parameter.VAR_KEYWORD))
+    return inspect.Signature(parameters)
+
+
+def _is_alias(node):
+    if isinstance(node, ast.Call):
+        return isinstance(node.func, ast.Name) and node.func.id in _ALIAS_CALLS
+    return isinstance(node, _ALIAS_NODES)
@@ -1,208 +1,514 @@
-from typing import get_type_hints, Any, TypeVar, Union, Callable, Literal
+from typing import get_type_hints, get_origin, get_args, Any, TypeVar, Union, Literal, NamedTuple
 
 from hypothesis import strategies as st
 from hypothesis.extra import numpy as stnumpy
 from binarytree import Node
 import numpy as np
 import array
-from collections import deque, abc
+import inspect
+from collections import deque, abc, OrderedDict
+import threading
+import types
 from datetime import datetime, date, time
 
 
-def type_to_strategy(annotation, visited_types=None):
-    """Converts type annotations to Hypothesis strategies."""
-    # Protect against recursive or infinite calls
-    if visited_types is None:
-        visited_types = set()
-    if annotation in visited_types:
-        raise ValueError(f"infinite recursivity found : {annotation}")
-
-    visited_types.add(annotation)
-
-    # Convert basic types
-    if annotation == int:
-        return "st.integers(min_value=-2**31, max_value=2**31-1)"
-    elif annotation == float:
-        return "st.floats()"
-    elif annotation == str:
-        return "st.text()"
-    elif annotation == bool:
-        return "st.booleans()"
-
-    # Handle arrays
-    elif annotation == array.array:
-        typecode_to_strategy = {
-            'i': 'st.integers(min_value=-2**31, max_value=2**31-1)',
-            'f': 'st.floats()',
-            'd': 'st.floats()',
-            'u': 'st.text()',
-            'c': 'st.complex_numbers()',
-        }
-        if hasattr(annotation, '__args__') and annotation.__args__:
-            element_type = annotation.__args__[0]
-            if element_type == int:
-                typecode = 'i'
-            elif element_type == float:
-                typecode = 'f'
-            elif element_type == complex:
-                typecode = 'c'
-            elif element_type == str:
-                typecode = 'u'
-            else:
-                typecode = 'i'
-        else:
-            typecode = 'i'
+class CacheInfo(NamedTuple):
+    hits: int
+    misses: int
+    maxsize: int
+    currsize: int
 
-        if typecode in typecode_to_strategy:
-            return f"st.builds(array.array, st.just('{typecode}'), st.lists({typecode_to_strategy[typecode]}))"
-        else:
-            raise ValueError(f"Unsupported array typecode: {typecode}")
-
-
-    # Handle more complex types
-    elif hasattr(annotation, '__origin__'):
-        if annotation.__origin__ == list:
-            return f"st.lists({type_to_strategy(annotation.__args__[0])})"
-        elif annotation.__origin__ == tuple:
-            return f"st.tuples({', '.join(type_to_strategy(arg) for arg in annotation.__args__)})"
-        elif annotation.__origin__ == dict:
-            key_type = type_to_strategy(annotation.__args__[0])
-            value_type = type_to_strategy(annotation.__args__[1])
-            return f"st.dictionaries({key_type}, {value_type})"
-        elif annotation.__origin__ == deque:
-            return f"st.builds(deque, st.lists({type_to_strategy(annotation.__args__[0])}))"
-        elif annotation.__origin__ == set:
-            return f"st.sets({type_to_strategy(annotation.__args__[0])})"
-        elif annotation.__origin__ == Union:
-            union_strategies = [type_to_strategy(arg) for arg in annotation.__args__]
-            return f"st.one_of({', '.join(union_strategies)})"
-
-
-    elif isinstance(annotation, TypeVar):
+
+class StrategyCache:
+    """Bounded LRU cache mapping normalized annotations to resolved strategies, safe to share between threads."""
+
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                value = self._entries[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            # Evict the least recently used entries
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def info(self):
+        with self._lock:
+            return CacheInfo(self.hits, self.misses, self.maxsize, len(self._entries))
+
+
+class SizeProfile(NamedTuple):
+    """Size caps of the collection, text and binary strategies, and of recursive structures."""
+    max_size: int  # Top-level values
+    nested_max_size: int  # Values inside another collection
+    max_examples: int
+    max_depth: int  # Levels of a recursive structure, such as a tree or a linked list
+    max_leaves: int
+
+
+PROFILES = {
+    'smoke': SizeProfile(max_size=5, nested_max_size=2, max_examples=20, max_depth=3, max_leaves=4),
+    'standard': SizeProfile(max_size=20, nested_max_size=5, max_examples=100, max_depth=6, max_leaves=32),
+    'deep': SizeProfile(max_size=200, nested_max_size=20, max_examples=1000, max_depth=12, max_leaves=1000),
+}
+_active_profile = PROFILES['standard']
+# Per thread: collection nesting depth and classes being resolved, see element_strategy() and _class_strategy()
+_nesting = threading.local()
+
+
+def use_profile(name):
+    """Makes every strategy resolved from now on follow the size caps of a named profile."""
+    global _active_profile
+    _active_profile = PROFILES[name]
+    strategy_cache.clear()
+    search_strategy_cache.clear()
+
+
+def size_profile():
+    return _active_profile
+
+
+def max_size():
+    """Returns the size cap of the strategy being resolved, smaller inside another collection."""
+    return _active_profile.nested_max_size if getattr(_nesting, 'depth', 0) else _active_profile.max_size
+
+
+def max_leaves():
+    """Returns the max_leaves of st.recursive() bounding the depth as well.
+    st.recursive() nests its extend function log2(max_leaves) + 1 times around the leaves."""
+    return min(_active_profile.max_leaves, 2 ** max(_active_profile.max_depth - 2, 0))
+
+
+def recursive_strategy(children, extend, leaves=None):
+    """Bounds a self-referencing strategy with st.recursive(). extend is the source of the strategy,
+    in which children names the strategy itself. Without a leaves source, leaves replace children
+    with st.nothing(), so the recursion ends on the optional references."""
+    if leaves is None:
+        leaves = f"(lambda {children}: {extend})(st.nothing())"
+    return f"st.recursive({leaves}, lambda {children}: {extend}, max_leaves={max_leaves()})"
+
+
+def _building():
+    """Returns the {class: children name} of the classes whose strategy this thread is resolving."""
+    if not hasattr(_nesting, 'building'):
+        _nesting.building = {}
+    return _nesting.building
+
+
+def element_strategy(annotation):
+    """Resolves the strategy of the elements, keys or values of a collection, with the nested size cap."""
+    _nesting.depth = getattr(_nesting, 'depth', 0) + 1
+    try:
+        return type_to_strategy(annotation)
+    finally:
+        _nesting.depth -= 1
+
+
+# Shared by every generate_test call of a run
+strategy_cache = StrategyCache()
+search_strategy_cache = StrategyCache()
+_MISSING = object()
+
+
+def normalize_annotation(annotation):
+    """Builds a hashable key so that equivalent annotations (List[int], list[int]) share a cache entry."""
+    if isinstance(annotation, (list, tuple)):
+        return tuple(normalize_annotation(arg) for arg in annotation)
+    origin = get_origin(annotation)
+    if origin is None:
+        return annotation
+    if origin is Literal:
+        # Literal[1] and Literal[True] compare equal as plain values
+        return origin, tuple((type(arg), arg) for arg in get_args(annotation))
+    return origin, tuple(normalize_annotation(arg) for arg in get_args(annotation))
+
+
+def type_to_strategy(annotation):
+    """Converts type annotations to Hypothesis strategies."""
+    try:
+        # The same annotation is capped differently at the top level and inside a collection
+        key = (max_size(), normalize_annotation(annotation))
+        hash(key)
+    except TypeError:
+        # Unhashable annotation, resolve it without caching
+        return _resolve_strategy(annotation)
+
+    strategy = strategy_cache.get(key, _MISSING)
+    if strategy is _MISSING:
+        strategy = _resolve_strategy(annotation)
+        # Strategies referring to an enclosing recursive class only make sense inside it
+        if not any(children in strategy for children in _building().values()):
+            strategy_cache.put(key, strategy)
+    return strategy
+
+
+def type_to_search_strategy(annotation):
+    """Converts type annotations to live Hypothesis strategy objects, following the type_to_strategy rules."""
+    try:
+        key = (max_size(), normalize_annotation(annotation))
+        hash(key)
+    except TypeError:
+        return _evaluate_strategy(annotation)
+
+    strategy = search_strategy_cache.get(key, _MISSING)
+    if strategy is _MISSING:
+        strategy = _evaluate_strategy(annotation)
+        search_strategy_cache.put(key, strategy)
+    return strategy
+
+
+def _evaluate_strategy(annotation):
+    # Class names are bound to the classes of this annotation only, so that classes of the same
+    # name elsewhere, or binarytree's Node, do not shadow them
+    namespace = strategy_namespace()
+    namespace.update(built_classes(annotation))
+    return eval(type_to_strategy(annotation), namespace)
+
+
+def strategy_namespace():
+    """Returns the names the strategy sources refer to, for evaluating them in-process."""
+    return {
+        'st': st,
+        'stnumpy': stnumpy,
+        'np': np,
+        'array': array,
+        'deque': deque,
+        'Node': Node,
+    }
+
+
+def _resolve_strategy(annotation):
+    # A class referring to itself, directly or through other classes, resolves to the recursive
+    # strategy of its outermost occurrence
+    building = _building()
+    if isinstance(annotation, type) and annotation in building:
+        return building[annotation]
+
+    # Constant-time dispatch on the exact type, then on the generic origin
+    handler = _strategy_handlers.get(annotation) or _strategy_handlers.get(get_origin(annotation))
+    if handler is not None:
+        return handler(annotation)
+
+    # Annotations that cannot be keyed by type
+    if isinstance(annotation, TypeVar):
         return "st.integers()"
-    elif annotation == Any:
-        return "st.one_of(st.integers(), st.floats(), st.text(), st.booleans())"
-
-    # Node (binary tree node)
-    elif annotation == Node:
-        return "st.builds(Node, st.integers(), st.one_of(st.none(), st.builds(Node, st.integers(), st.none(), st.none())), st.one_of(st.none(), st.builds(Node, st.integers(), st.none(), st.none())))"
+    if hasattr(annotation, '__supertype__'):  # Check for NewType
+        return type_to_strategy(annotation.__supertype__)
+    if isinstance(annotation, type) and hasattr(annotation, '_fields'):  # NamedTuple
+        return _named_tuple_strategy(annotation)
+    if isinstance(annotation, type):
+        return _class_strategy(annotation)
+
+    raise ValueError(f"Unsupported type: {annotation}")
 
-    # NumPy arrays
-    elif annotation == np.ndarray:
-        dtype = np.float64
-        shape = (3, 3)
 
-        if hasattr(annotation, '__args__') and annotation.__args__:
-            if len(annotation.__args__) > 0 and isinstance(annotation.__args__[0], type):
-                dtype = annotation.__args__[0]
-            if len(annotation.__args__) > 1 and isinstance(annotation.__args__[1], tuple):
-                shape = annotation.__args__[1]
+########################################################################################################################
+# Handler registry
 
-        dtype_strategy = {
-            int: stnumpy.integer_dtypes(),
-            float: stnumpy.floating_dtypes(),
-            complex: st.just(np.complex128),
-        }.get(dtype, stnumpy.floating_dtypes())
+# Maps an exact type, or a typing.get_origin() value, to handler(annotation) -> strategy source
+_strategy_handlers = {}
+# Project types given to register_strategy(), whose strategy sources may name them
+_registered_types = set()
 
-        return f"stnumpy.arrays(dtype={dtype_strategy}, shape={shape})"
 
+def register_strategy(type_, handler):
+    """Registers handler(annotation) -> strategy source for a type or a generic origin such as list.
+    The source may refer to the type by its name, see built_classes()."""
+    _strategy_handlers[type_] = handler
+    _registered_types.add(type_)
+    # Strategies resolved before the registration may now be stale
+    strategy_cache.clear()
+    search_strategy_cache.clear()
 
-    # Handle user-defined classes
-    elif isinstance(annotation, type) and hasattr(annotation, '__init__'):
-        init_params = get_type_hints(annotation.__init__)
-        init_strategies = ', '.join(
-            type_to_strategy(param) for param in init_params.values() if param != 'self' and param != 'return')
-        return f"st.builds({annotation.__name__}, {init_strategies})"
 
-    #Frozenset
-    elif annotation.__origin__ == frozenset:
-        return f"st.frozensets({type_to_strategy(annotation.__args__[0])})"
+def _handles(*handled_types):
+    """Registers the decorated function as the handler of every given type."""
+    def decorator(handler):
+        for type_ in handled_types:
+            _strategy_handlers[type_] = handler
+        return handler
+    return decorator
 
-    #NamedTuple
-    elif hasattr(annotation, '_fields'):
-        fields = ', '.join(type_to_strategy(annotation.__annotations__[field]) for field in annotation._fields)
-        return f"st.builds({annotation.__name__}, {fields})"
 
-    #Optional
-    elif annotation.__origin__ == Union and type(None) in annotation.__args__:
-        non_none_type = [arg for arg in annotation.__args__ if arg is not type(None)][0]
-        return f"st.one_of(st.none(), {type_to_strategy(non_none_type)})"
+def _type_args(annotation, count):
+    """Returns the type arguments of a generic, defaulting to Any for bare list, dict, ..."""
+    args = get_args(annotation)
+    return args if args else (Any,) * count
 
-    # Complex
-    elif annotation == complex:
-        real_strategy = 'st.floats()'  # or specify a range like st.floats(min_value=-100, max_value=100)
-        imag_strategy = 'st.floats()'  # similarly, you can specify ranges
-        return f"st.builds(complex, {real_strategy}, {imag_strategy})"
 
-    #Callable
-    elif annotation.__origin__ == Callable:
-        return "st.just(lambda *args, **kwargs: None)"
+########################################################################################################################
+# Built-in handlers
 
-    # byte
-    if annotation == bytes:
-        return "st.binary()"
-    elif annotation == bytearray:
-        return "st.builds(bytearray, st.binary())"
+def any_strategy():
+    return f"st.one_of(st.integers(), st.floats(), st.text(max_size={max_size()}), st.booleans())"
 
-    #Mapping
-    elif annotation.__origin__ == abc.Mapping:
-        key_type = type_to_strategy(annotation.__args__[0])
-        value_type = type_to_strategy(annotation.__args__[1])
-        return f"st.dictionaries({key_type}, {value_type})"
 
-    #Sequnece
-    elif annotation.__origin__ == abc.Sequence:
-        return f"st.lists({type_to_strategy(annotation.__args__[0])})"
+@_handles(int)
+def _int_strategy(annotation):
+    return "st.integers(min_value=-2**31, max_value=2**31-1)"
 
-    #MutableMapping
-    elif annotation.__origin__ == abc.MutableMapping:
-        key_type = type_to_strategy(annotation.__args__[0])
-        value_type = type_to_strategy(annotation.__args__[1])
-        return f"st.dictionaries({key_type}, {value_type})"
 
-    #MutableSequence
-    elif annotation.__origin__ == abc.MutableSequence:
-        return f"st.lists({type_to_strategy(annotation.__args__[0])})"
+@_handles(float)
+def _float_strategy(annotation):
+    return "st.floats()"
 
-    # Literal
-    elif annotation.__origin__ == Literal:
-        literals = ', '.join(repr(arg) for arg in annotation.__args__)
-        return f"st.sampled_from([{literals}])"
 
-    # Date time
-    elif annotation == datetime:
-        return "st.datetimes()"
-    elif annotation == date:
-        return "st.dates()"
-    elif annotation == time:
-        return "st.times()"
+@_handles(str)
+def _str_strategy(annotation):
+    return f"st.text(max_size={max_size()})"
 
-    #
-    elif hasattr(annotation, '__supertype__'):  # Check for NewType
-        base_type = annotation.__supertype__
-        return type_to_strategy(base_type)
 
+@_handles(bool)
+def _bool_strategy(annotation):
+    return "st.booleans()"
 
 
+@_handles(complex)
+def _complex_strategy(annotation):
+    real_strategy = 'st.floats()'  # or specify a range like st.floats(min_value=-100, max_value=100)
+    imag_strategy = 'st.floats()'  # similarly, you can specify ranges
+    return f"st.builds(complex, {real_strategy}, {imag_strategy})"
 
 
+@_handles(bytes)
+def _bytes_strategy(annotation):
+    return f"st.binary(max_size={max_size()})"
 
 
+@_handles(bytearray)
+def _bytearray_strategy(annotation):
+    return f"st.builds(bytearray, st.binary(max_size={max_size()}))"
 
 
+@_handles(type(None))
+def _none_strategy(annotation):
+    return "st.none()"
 
 
+@_handles(Any)
+def _any_strategy(annotation):
+    return any_strategy()
 
 
+# Date time
+@_handles(datetime)
+def _datetime_strategy(annotation):
+    return "st.datetimes()"
 
 
+@_handles(date)
+def _date_strategy(annotation):
+    return "st.dates()"
 
 
+@_handles(time)
+def _time_strategy(annotation):
+    return "st.times()"
 
 
+# Handle arrays
+@_handles(array.array)
+def _array_strategy(annotation):
+    typecode_to_strategy = {
+        'i': 'st.integers(min_value=-2**31, max_value=2**31-1)',
+        'f': 'st.floats()',
+        'd': 'st.floats()',
+        'u': 'st.characters()',
+        'c': 'st.complex_numbers()',
+    }
+    element_types = get_args(annotation)
+    if element_types:
+        typecode = {int: 'i', float: 'f', complex: 'c', str: 'u'}.get(element_types[0], 'i')
+    else:
+        typecode = 'i'
 
+    if typecode in typecode_to_strategy:
+        return (f"st.builds(array.array, st.just('{typecode}'), "
+                f"st.lists({typecode_to_strategy[typecode]}, max_size={max_size()}))")
+    raise ValueError(f"Unsupported array typecode: {typecode}")
 
 
+# Sequences
+@_handles(list, abc.Sequence, abc.MutableSequence)
+def _list_strategy(annotation):
+    element_type, = _type_args(annotation, 1)
+    return f"st.lists({element_strategy(element_type)}, max_size={max_size()})"
 
-    visited_types.remove(annotation)
-    raise ValueError(f"Unsupported type: {annotation}")
+
+@_handles(tuple)
+def _tuple_strategy(annotation):
+    element_types = get_args(annotation)
+    if len(element_types) == 2 and element_types[1] is Ellipsis:
+        # tuple[int, ...]
+        return f"st.lists({element_strategy(element_types[0])}, max_size={max_size()}).map(tuple)"
+    return f"st.tuples({', '.join(element_strategy(arg) for arg in element_types)})"
+
+
+@_handles(deque)
+def _deque_strategy(annotation):
+    element_type, = _type_args(annotation, 1)
+    return f"st.builds(deque, st.lists({element_strategy(element_type)}, max_size={max_size()}))"
+
+
+# Sets
+@_handles(set, abc.Set, abc.MutableSet)
+def _set_strategy(annotation):
+    element_type, = _type_args(annotation, 1)
+    return f"st.sets({element_strategy(element_type)}, max_size={max_size()})"
+
+
+@_handles(frozenset)
+def _frozenset_strategy(annotation):
+    element_type, = _type_args(annotation, 1)
+    return f"st.frozensets({element_strategy(element_type)}, max_size={max_size()})"
+
+
+# Mappings
+@_handles(dict, abc.Mapping, abc.MutableMapping)
+def _dict_strategy(annotation):
+    key_type, value_type = _type_args(annotation, 2)
+    return f"st.dictionaries({element_strategy(key_type)}, {element_strategy(value_type)}, max_size={max_size()})"
+
+
+# Union and Optional (the NoneType member resolves to st.none())
+@_handles(Union, types.UnionType)
+def _union_strategy(annotation):
+    union_strategies = [type_to_strategy(arg) for arg in get_args(annotation)]
+    return f"st.one_of({', '.join(union_strategies)})"
+
+
+@_handles(Literal)
+def _literal_strategy(annotation):
+    literals = ', '.join(repr(arg) for arg in get_args(annotation))
+    return f"st.sampled_from([{literals}])"
+
+
+@_handles(abc.Callable)
+def _callable_strategy(annotation):
+    return "st.just(lambda *args, **kwargs: None)"
+
+
+# Node (binary tree node)
+@_handles(Node)
+def _binary_tree_strategy(annotation):
+    return recursive_strategy(
+        'children', "st.builds(Node, st.integers(), st.one_of(st.none(), children), st.one_of(st.none(), children))",
+        leaves="st.builds(Node, st.integers())")
+
+
+# NumPy arrays
+@_handles(np.ndarray)
+def _ndarray_strategy(annotation):
+    dtype = np.float64
+    shape = (3, 3)
+
+    args = get_args(annotation)
+    if len(args) > 0 and isinstance(args[0], type):
+        dtype = args[0]
+    if len(args) > 1 and isinstance(args[1], tuple):
+        shape = args[1]
+
+    dtype_strategy = {
+        int: "stnumpy.integer_dtypes()",
+        float: "stnumpy.floating_dtypes()",
+        complex: "st.just(np.complex128)",
+    }.get(dtype, "stnumpy.floating_dtypes()")
+
+    return f"stnumpy.arrays(dtype={dtype_strategy}, shape={shape})"
+
+
+#NamedTuple
+def _named_tuple_strategy(annotation):
+    def fields():
+        field_types = get_type_hints(annotation)
+        return [(field, field_types[field], field in annotation._field_defaults) for field in annotation._fields]
+    return _builds_strategy(annotation, fields)
+
+
+# Handle user-defined classes
+def _class_strategy(annotation):
+    def init_params():
+        parameters = inspect.signature(annotation.__init__).parameters
+        return [(param, param_type, param in parameters and parameters[param].default is not inspect.Parameter.empty)
+                for param, param_type in get_type_hints(annotation.__init__).items() if param != 'return']
+    return _builds_strategy(annotation, init_params)
+
+
+def _builds_strategy(annotation, arguments):
+    """Builds a class from the strategies of its arguments(), (name, type, has a default) triples.
+    When they refer back to the class, the strategy is made recursive and its leaves leave out
+    the self-referencing arguments that have a default."""
+    building = _building()
+    children = f"children_{annotation.__name__}"
+    building[annotation] = children
+    try:
+        strategies = [(name, type_to_strategy(argument_type), has_default)
+                      for name, argument_type, has_default in arguments()]
+    finally:
+        del building[annotation]
+    strategy = f"st.builds({annotation.__name__}, {', '.join(strategy for _, strategy, _ in strategies)})"
+    if children not in strategy:
+        return strategy
+
+    leaf_arguments = [(name, strategy) for name, strategy, has_default in strategies
+                      if not (has_default and children in strategy)]
+    if any(children in strategy for _, strategy in leaf_arguments):
+        return recursive_strategy(children, strategy)
+    leaves = ', '.join(f"{name}={strategy}" for name, strategy in leaf_arguments)
+    return recursive_strategy(children, strategy, f"st.builds({annotation.__name__}, {leaves})")
+
+
+def built_classes(annotation, found=None):
+    """Returns the {name: class} of the classes that the strategy of annotation builds by name,
+    following the dispatch of _resolve_strategy() through the annotation objects."""
+    if found is None:
+        found = {}
+    if isinstance(annotation, (list, tuple)):
+        for arg in annotation:
+            built_classes(arg, found)
+        return found
+
+    origin = get_origin(annotation)
+    if origin is Literal:
+        return found  # Values, not types
+    try:
+        handled = annotation in _strategy_handlers or origin in _strategy_handlers
+    except TypeError:
+        handled = False  # Unhashable annotation
+    if handled or isinstance(annotation, TypeVar):
+        registered = origin or annotation
+        if registered in _registered_types and isinstance(registered, type):
+            found[registered.__name__] = registered
+        built_classes(get_args(annotation), found)
+    elif hasattr(annotation, '__supertype__'):  # NewType
+        built_classes(annotation.__supertype__, found)
+    elif isinstance(annotation, type) and found.get(annotation.__name__) is not annotation:
+        found[annotation.__name__] = annotation
+        if hasattr(annotation, '_fields'):  # NamedTuple
+            built_classes(list(get_type_hints(annotation).values()), found)
+        else:
+            built_classes([param_type for param, param_type in get_type_hints(annotation.__init__).items()
+                           if param != 'return'], found)
+    return found
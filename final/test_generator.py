@@ -0,0 +1,42 @@
+import pytest
+
+from generator import generate_module_tests, GeneratedModule
+
+SHAPES = '''
+class Point:
+    def __init__(self, x: int, y: int):
+        self.x = x
+        self.y = y
+'''
+
+GEOMETRY = '''
+from shapes import *
+
+try:
+    from decimal import Decimal
+except ImportError:
+    Decimal = float
+
+
+def norm(p: Point) -> int:
+    return abs(p.x) + abs(p.y)
+
+
+def half(value: int) -> Decimal:
+    return Decimal(value) / 2
+'''
+
+
+@pytest.mark.parametrize('static', [False, True])
+def test_header_imports_star_imported_and_conditional_names(tmp_path, monkeypatch, static):
+    (tmp_path / 'shapes.py').write_text(SHAPES)
+    (tmp_path / 'geometry.py').write_text(GEOMETRY)
+    monkeypatch.syspath_prepend(str(tmp_path))
+
+    file_path = str(tmp_path / 'geometry.py')
+    module_names, tests = generate_module_tests(file_path, 'geometry', static=static)
+    generated = GeneratedModule(file_path, 'geometry', module_names, tests, None)
+    namespace = {}
+    exec(generated.header + generated.test_code, namespace)
+    namespace['test_norm']()
+    namespace['test_half']()
@@ -0,0 +1,29 @@
+import hypothesis.core
+
+from generator import generate_state_machine
+from runner import load_module, run_in_process
+
+RECORDER = '''
+calls = []
+
+
+class Recorder:
+    def add(self, item: int):
+        calls.append(item)
+'''
+
+
+def test_seed_makes_state_machine_runs_reproducible(tmp_path, monkeypatch):
+    # Restored after the test, collect_tests() sets it for the whole process
+    monkeypatch.setattr(hypothesis.core, 'global_force_seed', None)
+    (tmp_path / 'recorder.py').write_text(RECORDER)
+    module = load_module(str(tmp_path / 'recorder.py'), 'recorder')
+    test_code = generate_state_machine('Recorder', None, [('add', ['item'], {'item': int})])
+
+    runs = []
+    for _ in range(2):
+        module.calls.clear()
+        results = run_in_process(test_code, module, hypothesis_seed=7)
+        assert [result.error for result in results] == [None]
+        runs.append(list(module.calls))
+    assert runs[0] and runs[0] == runs[1]
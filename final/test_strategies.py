@@ -0,0 +1,20 @@
+from hypothesis import given, settings, strategies as st
+
+from strategies import register_strategy, type_to_search_strategy, type_to_strategy, _strategy_handlers
+
+
+class Money:
+    def __init__(self, cents: int):
+        self.cents = cents
+
+
+@settings(max_examples=20)
+@given(st.data())
+def test_registered_type_is_built_by_name(data):
+    register_strategy(Money, lambda annotation: "st.builds(Money, st.integers(min_value=0))")
+    try:
+        assert type_to_strategy(list[Money]).startswith('st.lists(st.builds(Money')
+        amounts = data.draw(type_to_search_strategy(list[Money]))
+        assert all(isinstance(amount, Money) and amount.cents >= 0 for amount in amounts)
+    finally:
+        del _strategy_handlers[Money]
@@ -0,0 +1,83 @@
+"""Per-test timing and throughput, collected from Hypothesis observations and written as a JSON report."""
+import heapq
+import json
+import os
+
+from hypothesis.internal.observability import add_observability_callback, remove_observability_callback
+
+# Number of slowest examples kept per test
+SLOWEST_EXAMPLES = 5
+
+
+class TestTimings:
+    """Examples run by one test, with the time spent generating their data and running the target."""
+    __test__ = False  # Not a pytest test class
+
+    def __init__(self):
+        self.examples = 0
+        self.generate_seconds = 0.0
+        self.execute_seconds = 0.0
+        self.slowest = []  # Heap of (seconds, representation)
+
+    def add(self, observation):
+        execute_seconds = observation.timing.get('execute:test', 0.0)
+        self.examples += 1
+        self.execute_seconds += execute_seconds
+        self.generate_seconds += sum(seconds for key, seconds in observation.timing.items()
+                                     if key.startswith('generate:'))
+        example = (execute_seconds, observation.representation)
+        if len(self.slowest) < SLOWEST_EXAMPLES:
+            heapq.heappush(self.slowest, example)
+        else:
+            heapq.heappushpop(self.slowest, example)
+
+
+class TimingCollector:
+    """Observability callback gathering TestTimings while it is active (as a context manager).
+    Tests are keyed on (test file name, test name), the file name is empty for in-process runs."""
+
+    def __init__(self):
+        self.tests = {}
+
+    def __call__(self, observation):
+        if observation.type != 'test_case':
+            return
+        # pytest runs identify a test by node id, in-process runs by function name
+        file_path, _, name = observation.property.rpartition('::')
+        key = (os.path.basename(file_path), name)
+        self.tests.setdefault(key, TestTimings()).add(observation)
+
+    def __enter__(self):
+        add_observability_callback(self)
+        return self
+
+    def __exit__(self, *exc_info):
+        remove_observability_callback(self)
+
+
+def test_entry(module_name, name, passed, wall_seconds, timings):
+    """Builds the report entry of one test."""
+    timings = timings or TestTimings()
+    return {
+        'module': module_name,
+        'test': name,
+        'passed': passed,
+        'wall_seconds': round(wall_seconds, 6),
+        'examples': timings.examples,
+        'examples_per_second': round(timings.examples / wall_seconds, 2) if wall_seconds else None,
+        'generate_seconds': round(timings.generate_seconds, 6),
+        'execute_seconds': round(timings.execute_seconds, 6),
+        'slowest_examples': [{'seconds': round(seconds, 6), 'example': representation}
+                             for seconds, representation in sorted(timings.slowest, reverse=True)],
+    }
+
+
+def write_report(report_path, entries):
+    """Writes the report entries, slowest tests first."""
+    entries = sorted(entries, key=lambda entry: entry['wall_seconds'], reverse=True)
+    report = {
+        'total_seconds': round(sum(entry['wall_seconds'] for entry in entries), 6),
+        'tests': entries,
+    }
+    with open(report_path, 'w') as report_file:
+        json.dump(report, report_file, indent=2)
@@ -0,0 +1,158 @@
+"""Compiles return annotations into checker functions that the generated tests call on every result."""
+import array
+import hashlib
+import types
+from collections import deque, abc
+from typing import get_origin, get_args, Any, TypeVar, Union, Literal, NamedTuple
+
+import numpy as np
+
+from strategies import StrategyCache, normalize_annotation, _MISSING
+
+# Generic origins checked with isinstance(), and the name the generated code knows them by
+_COLLECTIONS = {
+    list: 'list',
+    set: 'set',
+    frozenset: 'frozenset',
+    deque: 'deque',
+}
+# Origins whose elements are checked without constraining the container type
+_ABSTRACT_COLLECTIONS = (abc.Sequence, abc.MutableSequence, abc.Set, abc.MutableSet)
+_ABSTRACT_MAPPINGS = (abc.Mapping, abc.MutableMapping)
+# Longest readable checker name before a hash is used instead
+MAX_NAME_LENGTH = 60
+
+
+class Validator(NamedTuple):
+    name: str
+    code: str  # Definition of the checker function, emitted once per test file
+
+
+# Shared by every generate_test call of a run
+validator_cache = StrategyCache()
+
+
+def validator(annotation):
+    """Returns the Validator of a return annotation, compiled once per distinct annotation."""
+    try:
+        key = normalize_annotation(annotation)
+        hash(key)
+    except TypeError:
+        return _compile(annotation)
+
+    compiled = validator_cache.get(key, _MISSING)
+    if compiled is _MISSING:
+        compiled = _compile(annotation)
+        validator_cache.put(key, compiled)
+    return compiled
+
+
+def _compile(annotation):
+    name = checker_name(annotation)
+    code = f"""
+def {name}(value):
+    return {check_expression(annotation, 'value')}
+"""
+    return Validator(name, code)
+
+
+def checker_name(annotation):
+    """Names the checker after the annotation, dict[str, list[int]] giving is_dict_str_list_int_<digest>.
+    Checkers of a test file are told apart by name, so distinct annotations get distinct names: the slug
+    of a generic flattens its nesting, Union[list, int] and Union[list[int]] alike, so generics end with
+    a digest of the whole annotation."""
+    slug = _describe(annotation)
+    origin = get_origin(annotation)
+    if origin is not None and origin is not Literal:
+        slug = f"{slug[:MAX_NAME_LENGTH - 11]}_{_digest(repr(normalize_annotation(annotation)))}"
+    elif len(slug) > MAX_NAME_LENGTH:
+        slug = f"{slug[:MAX_NAME_LENGTH - 11]}_{_digest(slug)}"
+    return f"is_{slug}"
+
+
+def _digest(text):
+    return hashlib.sha256(text.encode()).hexdigest()[:10]
+
+
+def _describe(annotation):
+    if annotation is None or annotation is type(None):
+        return 'None'
+    origin = get_origin(annotation)
+    args = get_args(annotation)
+    if origin is Literal:
+        # Values do not make reliable identifiers
+        return f"Literal_{_digest(repr([(type(arg), arg) for arg in args]))}"
+    if origin is not None:
+        origin_name = 'Union' if origin is types.UnionType else getattr(origin, '__name__', str(origin))
+        return '_'.join([origin_name, *(_describe(arg) for arg in args)] if args else [origin_name, 'empty'])
+    name = getattr(annotation, '__name__', str(annotation))
+    if not name.isidentifier():
+        return _digest(name)
+    return name
+
+
+def check_expression(annotation, value, depth=0):
+    """Builds the boolean expression checking that the named value matches annotation.
+    Nested elements are bound to item<depth>, key<depth> and value<depth> so that levels do not clash."""
+    if annotation is Any or annotation is object or isinstance(annotation, TypeVar) or annotation is Ellipsis:
+        return 'True'
+    if annotation is None or annotation is type(None):
+        return f"{value} is None"
+    if hasattr(annotation, '__supertype__'):  # NewType
+        return check_expression(annotation.__supertype__, value, depth)
+
+    origin = get_origin(annotation)
+    args = get_args(annotation)
+    if origin in (Union, types.UnionType):
+        return ' or '.join(f"({check_expression(arg, value, depth)})" for arg in args)
+    if origin is Literal:
+        # Compare the types too, so that Literal[1] does not accept True
+        literals = ''.join(f"{arg!r}, " for arg in args)
+        return f"any(type({value}) is type(literal) and {value} == literal for literal in ({literals}))"
+    if origin is tuple:
+        return _tuple_check(args, value, depth)
+    if origin in (dict, *_ABSTRACT_MAPPINGS):
+        key, item = f"key{depth}", f"value{depth}"
+        key_check, value_check = (check_expression(arg, name, depth + 1)
+                                  for arg, name in zip(args or (Any, Any), (key, item)))
+        container = f"isinstance({value}, dict)" if origin is dict else f"hasattr({value}, 'items')"
+        return _all(container, f"({key_check}) and ({value_check})", f"{key}, {item}", f"{value}.items()")
+    if origin in _COLLECTIONS or origin in _ABSTRACT_COLLECTIONS:
+        item = f"item{depth}"
+        item_check = check_expression(args[0] if args else Any, item, depth + 1)
+        container = (f"isinstance({value}, {_COLLECTIONS[origin]})" if origin in _COLLECTIONS
+                     else f"hasattr({value}, '__iter__')")
+        return _all(container, item_check, item, value)
+    if origin is abc.Callable:
+        return f"callable({value})"
+    if origin is not None:
+        return check_expression(origin, value, depth)
+
+    if annotation is array.array:
+        return f"isinstance({value}, array.array)"
+    if annotation is np.ndarray:
+        return f"isinstance({value}, np.ndarray)"
+    if annotation is tuple:
+        return f"isinstance({value}, tuple)"
+    if isinstance(annotation, type):
+        return f"isinstance({value}, {annotation.__name__})"
+    return 'True'
+
+
+def _tuple_check(args, value, depth):
+    if len(args) == 2 and args[1] is Ellipsis:
+        # tuple[int, ...]
+        item = f"item{depth}"
+        return _all(f"isinstance({value}, tuple)", check_expression(args[0], item, depth + 1), item, value)
+    if args == ((),):
+        args = ()  # tuple[()]
+    checks = [f"isinstance({value}, tuple)", f"len({value}) == {len(args)}"]
+    checks.extend(f"({check_expression(arg, f'{value}[{i}]', depth)})" for i, arg in enumerate(args))
+    return ' and '.join(check for check in checks if check != '(True)')
+
+
+def _all(container, element_check, target, iterable):
+    """Checks the container, then every element unless anything is accepted."""
+    if element_check == 'True':
+        return container
+    return f"{container} and all({element_check} for {target} in {iterable})"